@@ -10,11 +10,63 @@ LOGS_DIR = BASE_DIR / "logs"
 
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
 YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY", "")
+YOUTUBE_API_KEYS = os.getenv("YOUTUBE_API_KEYS", "")
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./data/metallica.db")
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", 5))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", 65536))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 268435456))
+READ_MODEL_ENABLED = os.getenv("READ_MODEL_ENABLED", "true").lower() in ("1", "true", "yes")
+# Syncs in other processes (scheduler, refresh_once) only share the database, so the bot polls it for changes.
+CATALOG_POLL_SECONDS = float(os.getenv("CATALOG_POLL_SECONDS", 30))
+# Listings are served either from the in-process read model or from SQLite through the Redis page cache
+# and single-flight. Those two layers are only a fallback for READ_MODEL_ENABLED=false and stay idle otherwise.
+PAGE_CACHE_ENABLED = os.getenv("PAGE_CACHE_ENABLED", "false" if READ_MODEL_ENABLED else "true").lower() in ("1", "true", "yes")
+PAGE_CACHE_TTL = int(os.getenv("PAGE_CACHE_TTL", 1800))
+LOCAL_CACHE_MAX_ENTRIES = int(os.getenv("LOCAL_CACHE_MAX_ENTRIES", 2048))
+LOCAL_CACHE_TTL = float(os.getenv("LOCAL_CACHE_TTL", 60))
+CACHE_GENERATION_TTL = float(os.getenv("CACHE_GENERATION_TTL", 5))
+REDIS_FAILURE_THRESHOLD = int(os.getenv("REDIS_FAILURE_THRESHOLD", 3))
+REDIS_RETRY_SECONDS = float(os.getenv("REDIS_RETRY_SECONDS", 30))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", 0.5))
+CACHE_SWEEP_BATCH = int(os.getenv("CACHE_SWEEP_BATCH", 500))
+CACHE_CODEC = os.getenv("CACHE_CODEC", "msgpack")
+CACHE_COMPRESSION = os.getenv("CACHE_COMPRESSION", "zstd")
+CACHE_COMPRESS_THRESHOLD = int(os.getenv("CACHE_COMPRESS_THRESHOLD", 1024))
+SINGLE_FLIGHT_TIMEOUT = float(os.getenv("SINGLE_FLIGHT_TIMEOUT", 5))
+PAGE_STORE_MAX_ENTRIES = int(os.getenv("PAGE_STORE_MAX_ENTRIES", 4096))
+PAGE_STORE_TTL = float(os.getenv("PAGE_STORE_TTL", 3600))
+PAGE_WARM_COUNT = int(os.getenv("PAGE_WARM_COUNT", 3))
+
+BOT_MODE = os.getenv("BOT_MODE", "polling").lower()
+WEBHOOK_BASE_URL = os.getenv("WEBHOOK_BASE_URL", "")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEBHOOK_QUEUE_SIZE = int(os.getenv("WEBHOOK_QUEUE_SIZE", 1000))
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", 8))
+WEBHOOK_DEDUP_TTL = float(os.getenv("WEBHOOK_DEDUP_TTL", 600))
 
 MAX_RESULTS_PER_PAGE = int(os.getenv("MAX_RESULTS_PER_PAGE", 10))
 SYNC_INTERVAL_HOURS = int(os.getenv("SYNC_INTERVAL_HOURS", 24))
+FULL_SYNC_INTERVAL_DAYS = int(os.getenv("FULL_SYNC_INTERVAL_DAYS", 7))
+SYNC_PROGRESS_INTERVAL = float(os.getenv("SYNC_PROGRESS_INTERVAL", 5))
+
+YOUTUBE_DAILY_QUOTA = int(os.getenv("YOUTUBE_DAILY_QUOTA", 10000))
+YOUTUBE_API_TIMEOUT = float(os.getenv("YOUTUBE_API_TIMEOUT", 30))
+YOUTUBE_HTTP_POOL_SIZE = int(os.getenv("YOUTUBE_HTTP_POOL_SIZE", 20))
+
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", 5))
+CRAWL_REQUESTS_PER_SECOND = float(os.getenv("CRAWL_REQUESTS_PER_SECOND", 5))
+CRAWL_RATE_LIMIT_RETRIES = int(os.getenv("CRAWL_RATE_LIMIT_RETRIES", 3))
+CRAWL_BACKOFF_BASE = float(os.getenv("CRAWL_BACKOFF_BASE", 1))
+CRAWL_BACKOFF_MAX = float(os.getenv("CRAWL_BACKOFF_MAX", 32))
+CRAWL_QUOTA_COOLDOWN = float(os.getenv("CRAWL_QUOTA_COOLDOWN", 3600))
+CRAWL_QUOTA_BUDGET = int(os.getenv("CRAWL_QUOTA_BUDGET", 8000))
+CRAWL_MAX_PAGES_PER_WINDOW = int(os.getenv("CRAWL_MAX_PAGES_PER_WINDOW", 5))
+CRAWL_ARCHIVE_START_YEAR = int(os.getenv("CRAWL_ARCHIVE_START_YEAR", 2005))
+CRAWL_UPLOADS_MAX_PAGES = int(os.getenv("CRAWL_UPLOADS_MAX_PAGES", 40))
+UPLOADS_SYNC_INTERVAL_MINUTES = int(os.getenv("UPLOADS_SYNC_INTERVAL_MINUTES", 60))
 
 ENABLE_AUTO_SYNC = True
 SYNC_HOUR = 3
@@ -1,157 +1,94 @@
 from aiogram import Router, F
 from aiogram.types import CallbackQuery
-from database.models import AsyncSessionLocal
-from database.repository import VideoRepository
+from database.models import AsyncReadSessionLocal
+from database.repository import VideoRepository, SearchHistoryRepository
 from utils.formatters import Formatter
-from bot.keyboards.inline import get_concerts_keyboard, get_interviews_keyboard, get_archive_keyboard, get_year_paging_keyboard, get_tour_paging_keyboard
-from bot.constants import CONTENT_TYPE_CONCERT, CONTENT_TYPE_INTERVIEW, RESULTS_PER_PAGE
+from bot.keyboards.inline import get_concerts_keyboard, get_interviews_keyboard, get_archive_keyboard, get_tour_paging_keyboard, get_search_keyboard
+from bot.constants import RESULTS_PER_PAGE
+from bot.rendering import get_page_store, parse_page_callback, parse_tour_callback, parse_year_callback, render_listing, render_tour, render_year, render_filtered_concerts
 
 router = Router()
 
-@router.callback_query(F.data.startswith("concerts_"))
-async def callback_concerts(callback: CallbackQuery):
-    parts = callback.data.split("_")
-    page = int(parts[1]) if len(parts) > 1 else 1
-    
-    async with AsyncSessionLocal() as session:
-        repo = VideoRepository(session)
-        offset = (page - 1) * RESULTS_PER_PAGE
-        videos = await repo.get_videos(content_type=CONTENT_TYPE_CONCERT, sort_by="date", sort_order="asc", limit=RESULTS_PER_PAGE, offset=offset)
-        count = await repo.get_videos_count(content_type=CONTENT_TYPE_CONCERT)
-    
-    if videos:
-        text = f"🎸 **Концерты Metallica** (страница {page})\n\n"
-        for video in videos:
-            text += Formatter.format_video_card(video) + "\n"
-        
-        total_pages = (count + RESULTS_PER_PAGE - 1) // RESULTS_PER_PAGE
-        await callback.message.edit_text(text, reply_markup=get_concerts_keyboard(page, total_pages), parse_mode="Markdown")
+async def _show_listing(callback: CallbackQuery, view: str, empty_text: str, empty_keyboard):
+    page, cursor = parse_page_callback(callback.data)
+    rendered = await get_page_store().get_or_render(callback.data, lambda: render_listing(view, page, cursor))
+
+    if rendered:
+        await callback.message.edit_text(rendered.text, reply_markup=rendered.reply_markup, parse_mode="Markdown")
     else:
-        await callback.message.edit_text("Концерты не найдены", reply_markup=get_concerts_keyboard(page, 1))
-    
+        await callback.message.edit_text(empty_text, reply_markup=empty_keyboard(page, 1))
+
     await callback.answer()
 
+@router.callback_query(F.data.startswith("concerts_"))
+async def callback_concerts(callback: CallbackQuery):
+    await _show_listing(callback, "concerts", "Концерты не найдены", get_concerts_keyboard)
+
 @router.callback_query(F.data.startswith("interviews_"))
 async def callback_interviews(callback: CallbackQuery):
-    parts = callback.data.split("_")
-    page = int(parts[1]) if len(parts) > 1 else 1
-    
-    async with AsyncSessionLocal() as session:
-        repo = VideoRepository(session)
-        offset = (page - 1) * RESULTS_PER_PAGE
-        videos = await repo.get_videos(content_type=CONTENT_TYPE_INTERVIEW, sort_by="date", sort_order="asc", limit=RESULTS_PER_PAGE, offset=offset)
-        count = await repo.get_videos_count(content_type=CONTENT_TYPE_INTERVIEW)
-    
-    if videos:
-        text = f"🎤 **Интервью Metallica** (страница {page})\n\n"
-        for video in videos:
-            text += Formatter.format_video_card(video) + "\n"
-        
-        total_pages = (count + RESULTS_PER_PAGE - 1) // RESULTS_PER_PAGE
-        await callback.message.edit_text(text, reply_markup=get_interviews_keyboard(page, total_pages), parse_mode="Markdown")
-    else:
-        await callback.message.edit_text("Интервью не найдены", reply_markup=get_interviews_keyboard(page, 1))
-    
-    await callback.answer()
+    await _show_listing(callback, "interviews", "Интервью не найдены", get_interviews_keyboard)
 
 @router.callback_query(F.data.startswith("archive_"))
 async def callback_archive(callback: CallbackQuery):
-    parts = callback.data.split("_")
-    page = int(parts[1]) if len(parts) > 1 else 1
-    
-    async with AsyncSessionLocal() as session:
-        repo = VideoRepository(session)
-        offset = (page - 1) * RESULTS_PER_PAGE
-        videos = await repo.get_videos(sort_by="date", sort_order="asc", limit=RESULTS_PER_PAGE, offset=offset)
-        count = await repo.get_videos_count()
-    
-    if videos:
-        text = f"📦 **Архив Metallica** (страница {page})\n\n"
-        for video in videos:
-            text += Formatter.format_video_card(video) + "\n"
-        
-        total_pages = (count + RESULTS_PER_PAGE - 1) // RESULTS_PER_PAGE
-        await callback.message.edit_text(text, reply_markup=get_archive_keyboard(page, total_pages), parse_mode="Markdown")
-    else:
-        await callback.message.edit_text("Записи не найдены", reply_markup=get_archive_keyboard(page, 1))
-    
-    await callback.answer()
+    await _show_listing(callback, "archive", "Записи не найдены", get_archive_keyboard)
 
 
 @router.callback_query(F.data.startswith("year_"))
 async def callback_year(callback: CallbackQuery):
-    parts = callback.data.split("_")
-    if len(parts) < 3:
+    state = parse_year_callback(callback.data)
+    if state is None:
         await callback.answer()
         return
 
-    year = int(parts[1])
-    concert_page = 1
-    interview_page = 1
-
-    for part in parts[2:]:
-        if part.startswith("c"):
-            concert_page = int(part[1:])
-        elif part.startswith("i"):
-            interview_page = int(part[1:])
-
-    async with AsyncSessionLocal() as session:
-        repo = VideoRepository(session)
-        concert_offset = (concert_page - 1) * RESULTS_PER_PAGE
-        interview_offset = (interview_page - 1) * RESULTS_PER_PAGE
-
-        concerts = await repo.get_videos(content_type=CONTENT_TYPE_CONCERT, year=year, sort_by="date", sort_order="asc", limit=RESULTS_PER_PAGE, offset=concert_offset)
-        interviews = await repo.get_videos(content_type=CONTENT_TYPE_INTERVIEW, year=year, sort_by="date", sort_order="asc", limit=RESULTS_PER_PAGE, offset=interview_offset)
-        concerts_count = await repo.get_videos_count(content_type=CONTENT_TYPE_CONCERT, year=year)
-        interviews_count = await repo.get_videos_count(content_type=CONTENT_TYPE_INTERVIEW, year=year)
-
-    total_count = concerts_count + interviews_count
-    text = f"📅 **Metallica {year}** ({total_count} записей)\n\n"
-
-    if concerts:
-        text += f"🎸 **Концерты** ({concerts_count})\n\n"
-        for video in concerts:
-            text += Formatter.format_video_card(video) + "\n"
-
-    if interviews:
-        text += f"🎤 **Интервью** ({interviews_count})\n\n"
-        for video in interviews:
-            text += Formatter.format_video_card(video) + "\n"
-
-    concert_total_pages = (concerts_count + RESULTS_PER_PAGE - 1) // RESULTS_PER_PAGE if concerts_count else 0
-    interview_total_pages = (interviews_count + RESULTS_PER_PAGE - 1) // RESULTS_PER_PAGE if interviews_count else 0
-
-    keyboard = get_year_paging_keyboard(year, concert_page, concert_total_pages, interview_page, interview_total_pages)
-    await callback.message.edit_text(text, reply_markup=keyboard, parse_mode="Markdown")
+    rendered = await get_page_store().get_or_render(callback.data, lambda: render_year(**state))
+    if rendered:
+        await callback.message.edit_text(rendered.text, reply_markup=rendered.reply_markup, parse_mode="Markdown")
+    else:
+        await callback.message.edit_text(f"😔 Записи за {state['year']} год не найдены")
     await callback.answer()
 
 
 @router.callback_query(F.data.startswith("tourpage_"))
 async def callback_tour_page(callback: CallbackQuery):
-    parts = callback.data.split("_")
-    if len(parts) < 3:
+    parsed = parse_tour_callback(callback.data)
+    if parsed is None:
         await callback.answer()
         return
 
-    page = int(parts[1])
-    tour_name = " ".join(parts[2:]).replace("_", " ")
+    page, cursor, tour_name = parsed
+    rendered = await get_page_store().get_or_render(callback.data, lambda: render_tour(tour_name, page, cursor))
 
-    async with AsyncSessionLocal() as session:
-        repo = VideoRepository(session)
-        offset = (page - 1) * RESULTS_PER_PAGE
-        videos = await repo.get_videos(tour_name=tour_name, sort_by="date", sort_order="asc", limit=RESULTS_PER_PAGE, offset=offset)
-        count = await repo.get_videos_count(tour_name=tour_name)
+    if rendered:
+        await callback.message.edit_text(rendered.text, reply_markup=rendered.reply_markup, parse_mode="Markdown")
+    else:
+        await callback.message.edit_text(f"😔 Концерты тура \"{tour_name}\" не найдены", reply_markup=get_tour_paging_keyboard(tour_name, 1, 1))
 
-    if videos:
-        text = f"🎫 **{tour_name}** ({count} записей)\n\n"
-        for video in videos:
-            text += Formatter.format_video_card(video) + "\n"
+    await callback.answer()
 
-        total_pages = (count + RESULTS_PER_PAGE - 1) // RESULTS_PER_PAGE
-        keyboard = get_tour_paging_keyboard(tour_name, page, total_pages)
+@router.callback_query(F.data.startswith("search_"))
+async def callback_search(callback: CallbackQuery):
+    parts = callback.data.split("_")
+    if len(parts) < 3 or not parts[1].isdigit() or not parts[2].isdigit():
+        await callback.answer()
+        return
+    page, search_id = int(parts[1]), int(parts[2])
+
+    async with AsyncReadSessionLocal() as session:
+        search = await SearchHistoryRepository(session).get_search(search_id)
+        # Search ids are sequential, so a forged callback must not page through another user's query.
+        if search is None or search.user_id != callback.from_user.id:
+            await callback.answer("Поиск устарел, повторите /search")
+            return
+        result = await VideoRepository(session).search_videos(search.query, limit=RESULTS_PER_PAGE, offset=(page - 1) * RESULTS_PER_PAGE)
+
+    if result.videos:
+        text = Formatter.format_search_header(search.query, result.total) + f" (страница {page})\n\n"
+        for video in result.videos:
+            text += Formatter.format_video_card(video) + "\n"
+        keyboard = get_search_keyboard(search_id, page, result.total_pages(RESULTS_PER_PAGE))
         await callback.message.edit_text(text, reply_markup=keyboard, parse_mode="Markdown")
     else:
-        await callback.message.edit_text(f"😔 Концерты тура \"{tour_name}\" не найдены", reply_markup=get_tour_paging_keyboard(tour_name, 1, 1))
+        await callback.message.edit_text(f"😔 По запросу \"{search.query}\" ничего не найдено", reply_markup=get_search_keyboard(search_id, 1, 1))
 
     await callback.answer()
 
@@ -182,20 +119,10 @@ async def callback_filter(callback: CallbackQuery):
     else:
         quality_filter = None
     
-    async with AsyncSessionLocal() as session:
-        repo = VideoRepository(session)
-        offset = 0
-        videos = await repo.get_videos(content_type=CONTENT_TYPE_CONCERT, quality_filter=quality_filter, sort_by="date", sort_order="asc", limit=RESULTS_PER_PAGE, offset=offset)
-        count = await repo.get_videos_count(content_type=CONTENT_TYPE_CONCERT, quality_filter=quality_filter)
+    rendered = await get_page_store().get_or_render(callback.data, lambda: render_filtered_concerts(quality_filter))
     
-    if videos:
-        filter_name = quality_filter if quality_filter else "Все"
-        text = f"🎸 **Концерты Metallica** (фильтр: {filter_name})\n\n"
-        for video in videos:
-            text += Formatter.format_video_card(video) + "\n"
-        
-        total_pages = (count + RESULTS_PER_PAGE - 1) // RESULTS_PER_PAGE
-        await callback.message.edit_text(text, reply_markup=get_concerts_keyboard(page=1, total_pages=total_pages), parse_mode="Markdown")
+    if rendered:
+        await callback.message.edit_text(rendered.text, reply_markup=rendered.reply_markup, parse_mode="Markdown")
     else:
         filter_name = quality_filter if quality_filter else "Все"
         await callback.message.edit_text(f"Концерты с фильтром '{filter_name}' не найдены", reply_markup=get_concerts_keyboard(page=1, total_pages=1))
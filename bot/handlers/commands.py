@@ -1,14 +1,18 @@
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
-from aiogram.filters import Command, CommandStart
-from database.models import AsyncSessionLocal
-from database.repository import VideoRepository, SyncStatusRepository
+from aiogram.filters import Command, CommandObject, CommandStart
+from database.models import AsyncReadSessionLocal, AsyncSessionLocal
+from database.repository import VideoRepository, SyncStatusRepository, SearchHistoryRepository
+from database.cache import get_cache
+from database.read_model import get_read_model
 from utils.formatters import Formatter
-from bot.keyboards.inline import get_concerts_keyboard, get_interviews_keyboard, get_archive_keyboard, get_tours_keyboard, get_year_paging_keyboard, get_tour_paging_keyboard, get_start_keyboard
+from bot.keyboards.inline import get_search_keyboard, get_start_keyboard
 from bot.keyboards.reply import get_main_keyboard
 from bot.constants import CONTENT_TYPE_CONCERT, CONTENT_TYPE_INTERVIEW, RESULTS_PER_PAGE
-from bot.config import YOUTUBE_API_KEY
-from services.youtube.search import YouTubeCrawler
+from services.youtube.jobs import get_sync_manager
+from services.youtube.planner import CRAWL_MODE_FULL
+from services.youtube.keys import get_key_pool
+from bot.rendering import entry_key, get_page_store, render_listing, render_tour, render_year
 
 router = Router()
 
@@ -21,84 +25,80 @@ async def cmd_start(message: Message):
     )
     await message.answer(welcome_text, reply_markup=get_start_keyboard(), parse_mode="Markdown")
 
-@router.message(Command("concerts"))
-async def cmd_concerts(message: Message):
-    await message.answer("🎸 Загрузка концертов...", reply_markup=None)
+async def _show_listing(message: Message, view: str, loading_text: str, no_results: str):
+    await message.answer(loading_text, reply_markup=None)
     
-    async with AsyncSessionLocal() as session:
-        repo = VideoRepository(session)
-        videos = await repo.get_videos(content_type=CONTENT_TYPE_CONCERT, sort_by="date", sort_order="asc", limit=10, offset=0)
-        count = await repo.get_videos_count(content_type=CONTENT_TYPE_CONCERT)
+    rendered = await get_page_store().get_or_render(entry_key(view), lambda: render_listing(view, entry=True))
     
-    if videos:
-        text = f"🎸 **Полные концерты Metallica** ({count} всего)\n\n"
-        for video in videos:
-            text += Formatter.format_video_card(video) + "\n"
-        
-        await message.answer(text, reply_markup=get_concerts_keyboard(page=1, total_pages=(count + 9) // 10), parse_mode="Markdown")
+    if rendered:
+        await message.answer(rendered.text, reply_markup=rendered.reply_markup, parse_mode="Markdown")
     else:
-        await message.answer(Formatter.format_no_results("concert"), reply_markup=get_main_keyboard())
+        await message.answer(Formatter.format_no_results(no_results), reply_markup=get_main_keyboard())
+
+@router.message(Command("concerts"))
+async def cmd_concerts(message: Message):
+    await _show_listing(message, "concerts", "🎸 Загрузка концертов...", "concert")
 
 @router.message(Command("interviews"))
 async def cmd_interviews(message: Message):
-    await message.answer("🎤 Загрузка интервью...", reply_markup=None)
-    
-    async with AsyncSessionLocal() as session:
-        repo = VideoRepository(session)
-        videos = await repo.get_videos(content_type=CONTENT_TYPE_INTERVIEW, sort_by="date", sort_order="asc", limit=10, offset=0)
-        count = await repo.get_videos_count(content_type=CONTENT_TYPE_INTERVIEW)
-    
-    if videos:
-        text = f"🎤 **Полные интервью Metallica** ({count} всего)\n\n"
-        for video in videos:
-            text += Formatter.format_video_card(video) + "\n"
-        
-        await message.answer(text, reply_markup=get_interviews_keyboard(page=1, total_pages=(count + 9) // 10), parse_mode="Markdown")
-    else:
-        await message.answer(Formatter.format_no_results("interview"), reply_markup=get_main_keyboard())
+    await _show_listing(message, "interviews", "🎤 Загрузка интервью...", "interview")
 
 @router.message(Command("archive"))
 async def cmd_archive(message: Message):
-    await message.answer("📦 Загрузка архива...", reply_markup=None)
-    
-    async with AsyncSessionLocal() as session:
-        repo = VideoRepository(session)
-        videos = await repo.get_videos(sort_by="date", sort_order="asc", limit=10, offset=0)
-        count = await repo.get_videos_count()
-    
-    if videos:
-        text = f"📦 **Архив Metallica** ({count} всего)\n\n"
-        for video in videos:
-            text += Formatter.format_video_card(video) + "\n"
-        
-        await message.answer(text, reply_markup=get_archive_keyboard(page=1, total_pages=(count + 9) // 10), parse_mode="Markdown")
-    else:
-        await message.answer(Formatter.format_no_results("archive"), reply_markup=get_main_keyboard())
+    await _show_listing(message, "archive", "📦 Загрузка архива...", "archive")
 
 @router.message(Command("stats"))
 async def cmd_stats(message: Message):
-    async with AsyncSessionLocal() as session:
-        repo = VideoRepository(session)
-        concerts = await repo.get_videos_count(content_type=CONTENT_TYPE_CONCERT)
-        interviews = await repo.get_videos_count(content_type=CONTENT_TYPE_INTERVIEW)
-        total = await repo.get_videos_count()
+    async with AsyncReadSessionLocal() as session:
+        counts = await VideoRepository(session).get_counts_by_type()
     
-    await message.answer(Formatter.format_stats(concerts, interviews, total), reply_markup=get_main_keyboard())
+    concerts = counts.get(CONTENT_TYPE_CONCERT, 0)
+    interviews = counts.get(CONTENT_TYPE_INTERVIEW, 0)
+    total = sum(counts.values())
+    
+    text = Formatter.format_stats(concerts, interviews, total)
+    snapshot = get_read_model().snapshot
+    if snapshot is not None:
+        text += "\n" + Formatter.format_read_model(snapshot.size)
+    cache_stats = get_cache().stats()
+    if cache_stats["hits"] or cache_stats["misses"]:
+        text += "\n" + Formatter.format_cache_stats(cache_stats)
+    key_pool = get_key_pool()
+    if len(key_pool):
+        await key_pool.load()
+        text += "\n" + Formatter.format_quota(key_pool.snapshot())
+    await message.answer(text, reply_markup=get_main_keyboard())
+
+def _refresh_reporter(status_message: Message):
+    async def report(job):
+        if job.done:
+            if job.error:
+                text = Formatter.format_error(f"Ошибка обновления: {job.error}")
+            else:
+                text = Formatter.format_refresh_status(job.progress.videos_found, job.videos_added)
+                if job.partial:
+                    text += f"\n⚠️ Обновление неполное: {job.partial}"
+        else:
+            text = Formatter.format_sync_progress(job.progress, job.elapsed)
+        await status_message.edit_text(text)
+    return report
 
 @router.message(Command("refresh"))
 async def cmd_refresh(message: Message):
-    await message.answer("🔄 Запускаю обновление базы...\n\nЭто может занять несколько минут. Пожалуйста, подождите.", reply_markup=get_main_keyboard())
-
-    if not YOUTUBE_API_KEY:
-        await message.answer("⚠️ YouTube API ключ не найден. Добавьте YOUTUBE_API_KEY в .env", reply_markup=get_main_keyboard())
+    if not len(get_key_pool()):
+        await message.answer("⚠️ YouTube API ключ не найден. Добавьте YOUTUBE_API_KEY или YOUTUBE_API_KEYS в .env", reply_markup=get_main_keyboard())
         return
 
-    try:
-        crawler = YouTubeCrawler()
-        videos_added = await crawler.sync_to_database()
-        await message.answer(Formatter.format_success(f"Обновление завершено. Добавлено: {videos_added}"), reply_markup=get_main_keyboard())
-    except Exception as exc:
-        await message.answer(Formatter.format_error(f"Ошибка обновления: {exc}"), reply_markup=get_main_keyboard())
+    manager = get_sync_manager()
+    running = manager.find(CRAWL_MODE_FULL)
+    if running is not None:
+        text = "🔄 Обновление уже идёт, показываю его прогресс.\n\n" + Formatter.format_sync_progress(running.progress, running.elapsed)
+    elif manager.current is not None:
+        text = "🔄 Сейчас идёт другое обновление, ваше начнётся сразу после него.\n\nПрогресс будет обновляться в этом сообщении."
+    else:
+        text = "🔄 Запускаю обновление базы...\n\nПрогресс будет обновляться в этом сообщении."
+    status_message = await message.answer(text)
+    manager.start(CRAWL_MODE_FULL, subscriber=_refresh_reporter(status_message))
 
 @router.message(Command("help"))
 async def cmd_help(message: Message):
@@ -121,6 +121,28 @@ async def cmd_help(message: Message):
     )
     await message.answer(help_text, reply_markup=get_main_keyboard(), parse_mode="Markdown")
 
+@router.message(Command("search"))
+async def cmd_search(message: Message, command: CommandObject):
+    query = (command.args or "").strip()
+    if not query:
+        await message.answer("Укажите запрос: /search [запрос]", reply_markup=get_main_keyboard())
+        return
+    
+    async with AsyncReadSessionLocal() as session:
+        result = await VideoRepository(session).search_videos(query, limit=RESULTS_PER_PAGE)
+    
+    async with AsyncSessionLocal() as session:
+        search = await SearchHistoryRepository(session).add_search(message.from_user.id if message.from_user else 0, query, result.total)
+    
+    if result.videos:
+        text = Formatter.format_search_header(query, result.total) + "\n\n"
+        for video in result.videos:
+            text += Formatter.format_video_card(video) + "\n"
+        keyboard = get_search_keyboard(search.id, 1, result.total_pages(RESULTS_PER_PAGE))
+        await message.answer(text, reply_markup=keyboard, parse_mode="Markdown")
+    else:
+        await message.answer(f"😔 По запросу \"{query}\" ничего не найдено", reply_markup=get_main_keyboard())
+
 @router.message()
 async def cmd_default(message: Message):
     text = message.text or ""
@@ -200,17 +222,10 @@ async def text_years(message: Message):
 async def show_tour(message: Message, tour_name: str):
     await message.answer(f"🎫 Поиск тура: {tour_name}...")
     
-    async with AsyncSessionLocal() as session:
-        repo = VideoRepository(session)
-        videos = await repo.get_videos(tour_name=tour_name, sort_by="date", sort_order="asc", limit=10, offset=0)
-        count = await repo.get_videos_count(tour_name=tour_name)
+    rendered = await get_page_store().get_or_render(entry_key("tour", tour_name), lambda: render_tour(tour_name))
     
-    if videos:
-        text = f"🎫 **{tour_name}** ({count} записей)\n\n"
-        for video in videos:
-            text += Formatter.format_video_card(video) + "\n"
-        total_pages = (count + RESULTS_PER_PAGE - 1) // RESULTS_PER_PAGE
-        await message.answer(text, reply_markup=get_tour_paging_keyboard(tour_name, 1, total_pages), parse_mode="Markdown")
+    if rendered:
+        await message.answer(rendered.text, reply_markup=rendered.reply_markup, parse_mode="Markdown")
     else:
         await message.answer(f"😔 Концерты тура \"{tour_name}\" не найдены", reply_markup=get_main_keyboard())
 
@@ -221,30 +236,9 @@ async def show_year(message: Message, year: int):
     
     await message.answer(f"📅 Поиск записей за {year} год...")
     
-    async with AsyncSessionLocal() as session:
-        repo = VideoRepository(session)
-        concerts = await repo.get_videos(content_type=CONTENT_TYPE_CONCERT, year=year, sort_by="date", sort_order="asc", limit=10, offset=0)
-        interviews = await repo.get_videos(content_type=CONTENT_TYPE_INTERVIEW, year=year, sort_by="date", sort_order="asc", limit=10, offset=0)
-        concerts_count = await repo.get_videos_count(content_type=CONTENT_TYPE_CONCERT, year=year)
-        interviews_count = await repo.get_videos_count(content_type=CONTENT_TYPE_INTERVIEW, year=year)
+    rendered = await get_page_store().get_or_render(entry_key("year", year), lambda: render_year(year))
     
-    if concerts or interviews:
-        total_count = concerts_count + interviews_count
-        text = f"📅 **Metallica {year}** ({total_count} записей)\n\n"
-
-        if concerts:
-            text += f"🎸 **Концерты** ({concerts_count})\n\n"
-            for video in concerts:
-                text += Formatter.format_video_card(video) + "\n"
-
-        if interviews:
-            text += f"🎤 **Интервью** ({interviews_count})\n\n"
-            for video in interviews:
-                text += Formatter.format_video_card(video) + "\n"
-
-        concert_total_pages = (concerts_count + RESULTS_PER_PAGE - 1) // RESULTS_PER_PAGE if concerts_count else 0
-        interview_total_pages = (interviews_count + RESULTS_PER_PAGE - 1) // RESULTS_PER_PAGE if interviews_count else 0
-        keyboard = get_year_paging_keyboard(year, 1, concert_total_pages, 1, interview_total_pages)
-        await message.answer(text, reply_markup=keyboard, parse_mode="Markdown")
+    if rendered:
+        await message.answer(rendered.text, reply_markup=rendered.reply_markup, parse_mode="Markdown")
     else:
         await message.answer(f"😔 Записи за {year} год не найдены", reply_markup=get_main_keyboard())
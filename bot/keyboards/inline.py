@@ -1,7 +1,19 @@
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from typing import Optional, Tuple
 from bot.constants import RESULTS_PER_PAGE
 
+CALLBACK_DATA_LIMIT = 64
+
+def _page_callback(prefix: str, page: int, cursor: Optional[str] = None, suffix: str = "") -> str:
+    base = f"{prefix}_{page}"
+    tail = f"_{suffix}" if suffix else ""
+    if cursor:
+        data = f"{base}_{cursor}{tail}"
+        if len(data.encode()) <= CALLBACK_DATA_LIMIT:
+            return data
+    return f"{base}{tail}"
+
 def get_main_keyboard() -> ReplyKeyboardMarkup:
     keyboard = ReplyKeyboardMarkup(
         keyboard=[
@@ -23,15 +35,21 @@ def get_main_keyboard() -> ReplyKeyboardMarkup:
     )
     return keyboard
 
-def get_concerts_keyboard(page: int = 1, total_pages: int = 1, quality_filter: str = None) -> InlineKeyboardMarkup:
+def get_concerts_keyboard(
+    page: int = 1,
+    total_pages: int = 1,
+    quality_filter: str = None,
+    prev_cursor: Optional[str] = None,
+    next_cursor: Optional[str] = None
+) -> InlineKeyboardMarkup:
     buttons = []
     
     row1 = []
     if page > 1:
-        row1.append(InlineKeyboardButton(text="⬅️ Назад", callback_data=f"concerts_{page-1}"))
+        row1.append(InlineKeyboardButton(text="⬅️ Назад", callback_data=_page_callback("concerts", page - 1, prev_cursor)))
     row1.append(InlineKeyboardButton(text=f"{page}/{total_pages}", callback_data="page_info"))
     if page < total_pages:
-        row1.append(InlineKeyboardButton(text="➡️ Далее", callback_data=f"concerts_{page+1}"))
+        row1.append(InlineKeyboardButton(text="➡️ Далее", callback_data=_page_callback("concerts", page + 1, next_cursor)))
     
     row2 = [
         InlineKeyboardButton(text="⭐ HD", callback_data="filter_hd"),
@@ -46,15 +64,20 @@ def get_concerts_keyboard(page: int = 1, total_pages: int = 1, quality_filter: s
     keyboard = InlineKeyboardMarkup(inline_keyboard=[row1, row2, row3])
     return keyboard
 
-def get_interviews_keyboard(page: int = 1, total_pages: int = 1) -> InlineKeyboardMarkup:
+def get_interviews_keyboard(
+    page: int = 1,
+    total_pages: int = 1,
+    prev_cursor: Optional[str] = None,
+    next_cursor: Optional[str] = None
+) -> InlineKeyboardMarkup:
     buttons = []
     
     row1 = []
     if page > 1:
-        row1.append(InlineKeyboardButton(text="⬅️ Назад", callback_data=f"interviews_{page-1}"))
+        row1.append(InlineKeyboardButton(text="⬅️ Назад", callback_data=_page_callback("interviews", page - 1, prev_cursor)))
     row1.append(InlineKeyboardButton(text=f"{page}/{total_pages}", callback_data="page_info"))
     if page < total_pages:
-        row1.append(InlineKeyboardButton(text="➡️ Далее", callback_data=f"interviews_{page+1}"))
+        row1.append(InlineKeyboardButton(text="➡️ Далее", callback_data=_page_callback("interviews", page + 1, next_cursor)))
     
     row2 = [
         InlineKeyboardButton(text="🔙 В меню", callback_data="back_to_menu")
@@ -63,13 +86,18 @@ def get_interviews_keyboard(page: int = 1, total_pages: int = 1) -> InlineKeyboa
     keyboard = InlineKeyboardMarkup(inline_keyboard=[row1, row2])
     return keyboard
 
-def get_archive_keyboard(page: int = 1, total_pages: int = 1) -> InlineKeyboardMarkup:
+def get_archive_keyboard(
+    page: int = 1,
+    total_pages: int = 1,
+    prev_cursor: Optional[str] = None,
+    next_cursor: Optional[str] = None
+) -> InlineKeyboardMarkup:
     row1 = []
     if page > 1:
-        row1.append(InlineKeyboardButton(text="⬅️ Назад", callback_data=f"archive_{page-1}"))
+        row1.append(InlineKeyboardButton(text="⬅️ Назад", callback_data=_page_callback("archive", page - 1, prev_cursor)))
     row1.append(InlineKeyboardButton(text=f"{page}/{total_pages}", callback_data="page_info"))
     if page < total_pages:
-        row1.append(InlineKeyboardButton(text="➡️ Далее", callback_data=f"archive_{page+1}"))
+        row1.append(InlineKeyboardButton(text="➡️ Далее", callback_data=_page_callback("archive", page + 1, next_cursor)))
     
     row2 = [
         InlineKeyboardButton(text="🔙 В меню", callback_data="back_to_menu")
@@ -114,27 +142,41 @@ def get_year_paging_keyboard(
     concert_page: int,
     concert_total_pages: int,
     interview_page: int,
-    interview_total_pages: int
+    interview_total_pages: int,
+    concert_cursors: Tuple[Optional[str], Optional[str], Optional[str]] = (None, None, None),
+    interview_cursors: Tuple[Optional[str], Optional[str], Optional[str]] = (None, None, None)
 ) -> InlineKeyboardMarkup:
     rows = []
+    concert_prev, concert_current, concert_next = concert_cursors
+    interview_prev, interview_current, interview_next = interview_cursors
+
+    def year_callback(concert_state: Tuple[int, Optional[str]], interview_state: Tuple[int, Optional[str]]) -> str:
+        (c_page, c_cursor), (i_page, i_cursor) = concert_state, interview_state
+        data = f"year_{year}_c{c_page}{c_cursor or ''}_i{i_page}{i_cursor or ''}"
+        if len(data.encode()) <= CALLBACK_DATA_LIMIT:
+            return data
+        return f"year_{year}_c{c_page}_i{i_page}"
+
+    def state(page: int, cursor: Optional[str]) -> Tuple[int, Optional[str]]:
+        return page, cursor
 
     concert_row = []
     if concert_total_pages > 0:
         if concert_page > 1:
-            concert_row.append(InlineKeyboardButton(text="🎸 ⬅️", callback_data=f"year_{year}_c{concert_page-1}_i{interview_page}"))
+            concert_row.append(InlineKeyboardButton(text="🎸 ⬅️", callback_data=year_callback(state(concert_page - 1, concert_prev), state(interview_page, interview_current))))
         concert_row.append(InlineKeyboardButton(text=f"🎸 {concert_page}/{concert_total_pages}", callback_data="page_info"))
         if concert_page < concert_total_pages:
-            concert_row.append(InlineKeyboardButton(text="🎸 ➡️", callback_data=f"year_{year}_c{concert_page+1}_i{interview_page}"))
+            concert_row.append(InlineKeyboardButton(text="🎸 ➡️", callback_data=year_callback(state(concert_page + 1, concert_next), state(interview_page, interview_current))))
     if concert_row:
         rows.append(concert_row)
 
     interview_row = []
     if interview_total_pages > 0:
         if interview_page > 1:
-            interview_row.append(InlineKeyboardButton(text="🎤 ⬅️", callback_data=f"year_{year}_c{concert_page}_i{interview_page-1}"))
+            interview_row.append(InlineKeyboardButton(text="🎤 ⬅️", callback_data=year_callback(state(concert_page, concert_current), state(interview_page - 1, interview_prev))))
         interview_row.append(InlineKeyboardButton(text=f"🎤 {interview_page}/{interview_total_pages}", callback_data="page_info"))
         if interview_page < interview_total_pages:
-            interview_row.append(InlineKeyboardButton(text="🎤 ➡️", callback_data=f"year_{year}_c{concert_page}_i{interview_page+1}"))
+            interview_row.append(InlineKeyboardButton(text="🎤 ➡️", callback_data=year_callback(state(concert_page, concert_current), state(interview_page + 1, interview_next))))
     if interview_row:
         rows.append(interview_row)
 
@@ -143,18 +185,38 @@ def get_year_paging_keyboard(
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
-def get_tour_paging_keyboard(tour_name: str, page: int, total_pages: int) -> InlineKeyboardMarkup:
+def get_tour_paging_keyboard(
+    tour_name: str,
+    page: int,
+    total_pages: int,
+    prev_cursor: Optional[str] = None,
+    next_cursor: Optional[str] = None
+) -> InlineKeyboardMarkup:
     rows = []
 
     tour_slug = tour_name.replace(" ", "_")
     row = []
     if page > 1:
-        row.append(InlineKeyboardButton(text="⬅️ Назад", callback_data=f"tourpage_{page-1}_{tour_slug}"))
+        row.append(InlineKeyboardButton(text="⬅️ Назад", callback_data=_page_callback("tourpage", page - 1, prev_cursor, tour_slug)))
     row.append(InlineKeyboardButton(text=f"{page}/{total_pages}", callback_data="page_info"))
     if page < total_pages:
-        row.append(InlineKeyboardButton(text="➡️ Далее", callback_data=f"tourpage_{page+1}_{tour_slug}"))
+        row.append(InlineKeyboardButton(text="➡️ Далее", callback_data=_page_callback("tourpage", page + 1, next_cursor, tour_slug)))
     rows.append(row)
 
     rows.append([InlineKeyboardButton(text="🔙 В меню", callback_data="back_to_menu")])
 
     return InlineKeyboardMarkup(inline_keyboard=rows)
+
+
+def get_search_keyboard(search_id: int, page: int, total_pages: int) -> InlineKeyboardMarkup:
+    row = []
+    if page > 1:
+        row.append(InlineKeyboardButton(text="⬅️ Назад", callback_data=f"search_{page - 1}_{search_id}"))
+    row.append(InlineKeyboardButton(text=f"{page}/{total_pages}", callback_data="page_info"))
+    if page < total_pages:
+        row.append(InlineKeyboardButton(text="➡️ Далее", callback_data=f"search_{page + 1}_{search_id}"))
+
+    return InlineKeyboardMarkup(inline_keyboard=[
+        row,
+        [InlineKeyboardButton(text="🔙 В меню", callback_data="back_to_menu")]
+    ])
@@ -1,58 +1,119 @@
 import asyncio
 import logging
 import os
+import secrets
+from typing import Tuple
 
 from aiohttp import web
 from aiogram import Bot, Dispatcher
 from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.webhook.aiohttp_server import setup_application
 
-from bot.config import TELEGRAM_BOT_TOKEN
+from bot.config import TELEGRAM_BOT_TOKEN, BOT_MODE, WEBHOOK_BASE_URL, WEBHOOK_PATH, WEBHOOK_SECRET
 from bot.handlers import setup_handlers
-from database.models import init_db
+from bot.webhook import QueuedRequestHandler
+from database.cache import drop_local_pages
+from database.models import init_db_async
+from database.read_model import get_read_model, get_catalog_watcher
+from bot.rendering import warm_pages
 
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-async def start_health_server() -> None:
+def create_app() -> web.Application:
     app = web.Application()
 
     async def health(_: web.Request) -> web.Response:
         return web.Response(text="ok")
 
     app.router.add_get("/health", health)
+    return app
+
 
+async def start_web_app(app: web.Application) -> None:
     runner = web.AppRunner(app)
     await runner.setup()
 
     port = int(os.getenv("PORT", "10000"))
     site = web.TCPSite(runner, "0.0.0.0", port)
     await site.start()
-    logger.info("Health server started on port %s", port)
+    logger.info("Web server started on port %s", port)
 
 
-async def start_bot() -> None:
+async def start_health_server() -> None:
+    await start_web_app(create_app())
+
+
+async def create_bot() -> Tuple[Bot, Dispatcher]:
     if not TELEGRAM_BOT_TOKEN:
         raise RuntimeError("TELEGRAM_BOT_TOKEN is not set. Update .env file.")
 
-    init_db()
+    await init_db_async()
+    # Taken before the load, so a sync landing in between is picked up by the next poll rather than missed.
+    watcher = get_catalog_watcher()
+    await watcher.check()
+    read_model = get_read_model()
+    snapshot = await read_model.load()
+    if snapshot is not None:
+        logger.info("Catalog read model loaded: %s videos", snapshot.size)
+    # Order matters: pages are re-rendered only once the snapshot and the local cache tier are fresh.
+    watcher.add_listener(read_model.refresh)
+    watcher.add_listener(drop_local_pages)
+    watcher.add_listener(warm_pages)
+    logger.info("Pre-rendered %s listing pages", await warm_pages())
+    watcher.start()
 
     bot = Bot(token=TELEGRAM_BOT_TOKEN)
     storage = MemoryStorage()
     dp = Dispatcher(storage=storage)
 
     setup_handlers(dp)
+    return bot, dp
+
+
+async def start_bot() -> None:
+    bot, dp = await create_bot()
 
-    logger.info("Starting Metallica Archive Bot...")
+    # getUpdates is refused while a webhook is registered, e.g. after switching back from webhook mode.
+    await bot.delete_webhook()
+    logger.info("Starting Metallica Archive Bot (polling)...")
     await dp.start_polling(bot)
 
 
-async def main():
-    await asyncio.gather(
-        start_health_server(),
-        start_bot()
+async def start_webhook() -> None:
+    if not WEBHOOK_BASE_URL:
+        raise RuntimeError("WEBHOOK_BASE_URL is not set. Update .env file or use BOT_MODE=polling.")
+
+    bot, dp = await create_bot()
+    # Telegram echoes the secret back in a header; a random one is enough since we register it ourselves.
+    secret_token = WEBHOOK_SECRET or secrets.token_urlsafe(32)
+
+    app = create_app()
+    handler = QueuedRequestHandler(dp, bot, secret_token=secret_token)
+    handler.register(app, path=WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+    handler.start()
+
+    await start_web_app(app)
+    await bot.set_webhook(
+        WEBHOOK_BASE_URL.rstrip("/") + WEBHOOK_PATH,
+        secret_token=secret_token,
+        allowed_updates=dp.resolve_used_update_types()
     )
+    logger.info("Starting Metallica Archive Bot (webhook at %s)...", WEBHOOK_PATH)
+    await asyncio.Event().wait()
+
+
+async def main():
+    if BOT_MODE == "webhook":
+        await start_webhook()
+    else:
+        await asyncio.gather(
+            start_health_server(),
+            start_bot()
+        )
 
 
 if __name__ == "__main__":
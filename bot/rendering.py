@@ -0,0 +1,227 @@
+import re
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from aiogram.types import InlineKeyboardMarkup
+
+from bot.config import PAGE_STORE_MAX_ENTRIES, PAGE_STORE_TTL, PAGE_WARM_COUNT
+from bot.constants import CONTENT_TYPE_CONCERT, CONTENT_TYPE_INTERVIEW, RESULTS_PER_PAGE
+from bot.keyboards.inline import get_concerts_keyboard, get_interviews_keyboard, get_archive_keyboard, get_year_paging_keyboard, get_tour_paging_keyboard
+from database.cache import LocalCache
+from database.pagination import PageCursor
+from database.read_model import fetch_page, fetch_year_facets
+from utils.formatters import Formatter
+
+NEXT_BUTTON_TEXT = "➡️ Далее"
+YEAR_STATE_PATTERN = re.compile(r"^([ci])(\d+)(.*)$")
+
+
+@dataclass(frozen=True)
+class RenderedPage:
+    text: str
+    reply_markup: InlineKeyboardMarkup
+
+
+@dataclass(frozen=True)
+class ListingView:
+    filters: Dict[str, str]
+    title: str
+    entry_title: str
+    keyboard: Callable[..., InlineKeyboardMarkup]
+
+
+LISTING_VIEWS = {
+    "concerts": ListingView(
+        {"content_type": CONTENT_TYPE_CONCERT}, "🎸 **Концерты Metallica**", "🎸 **Полные концерты Metallica**", get_concerts_keyboard
+    ),
+    "interviews": ListingView(
+        {"content_type": CONTENT_TYPE_INTERVIEW}, "🎤 **Интервью Metallica**", "🎤 **Полные интервью Metallica**", get_interviews_keyboard
+    ),
+    "archive": ListingView({}, "📦 **Архив Metallica**", "📦 **Архив Metallica**", get_archive_keyboard),
+}
+
+
+class PageStore:
+    """Rendered text and keyboards keyed by the view, filters and page that produced them.
+
+    Keys are the callback data of the button that opens a page (or a fixed key
+    for a command's first page), so a repeated press is a dict lookup. The
+    catalog watcher re-runs warm_pages on every catalog change, including
+    syncs in other processes, so entries never outlive the data they show.
+    """
+
+    def __init__(self, max_entries: int = PAGE_STORE_MAX_ENTRIES, ttl: float = PAGE_STORE_TTL):
+        self.pages = LocalCache(max_entries, ttl)
+        self.hits = 0
+        self.misses = 0
+
+    async def get_or_render(self, key: str, render: Callable[[], Awaitable[Optional[RenderedPage]]]) -> Optional[RenderedPage]:
+        rendered = self.pages.get(key)
+        if rendered is not None:
+            self.hits += 1
+            return rendered
+        self.misses += 1
+        rendered = await render()
+        if rendered is not None:
+            self.pages.set(key, rendered)
+        return rendered
+
+    def clear(self):
+        self.pages.clear()
+
+    def __len__(self) -> int:
+        return len(self.pages)
+
+
+_page_store: Optional[PageStore] = None
+
+
+def get_page_store() -> PageStore:
+    global _page_store
+    if _page_store is None:
+        _page_store = PageStore()
+    return _page_store
+
+
+def parse_page_callback(data: str) -> Tuple[int, Optional[PageCursor]]:
+    parts = data.split("_")
+    page = int(parts[1]) if len(parts) > 1 else 1
+    cursor = PageCursor.decode(parts[2]) if len(parts) > 2 else None
+    return page, cursor
+
+
+def parse_tour_callback(data: str) -> Optional[Tuple[int, Optional[PageCursor], str]]:
+    parts = data.split("_")
+    if len(parts) < 3:
+        return None
+    page = int(parts[1])
+    cursor = None
+    name_parts = parts[2:]
+    if len(name_parts) > 1 and PageCursor.is_token(name_parts[0]):
+        cursor = PageCursor.decode(name_parts[0])
+        name_parts = name_parts[1:]
+    return page, cursor, " ".join(name_parts).replace("_", " ")
+
+
+def parse_year_callback(data: str) -> Optional[Dict[str, object]]:
+    parts = data.split("_")
+    if len(parts) < 3:
+        return None
+    state = {"year": int(parts[1])}
+    for part in parts[2:]:
+        match = YEAR_STATE_PATTERN.match(part)
+        if not match:
+            continue
+        facet, page, token = match.groups()
+        name = "concert" if facet == "c" else "interview"
+        state[f"{name}_page"], state[f"{name}_cursor"] = int(page), PageCursor.decode(token)
+    return state
+
+
+def render_cards(videos) -> str:
+    return "".join(Formatter.format_video_card(video) + "\n" for video in videos)
+
+
+def entry_key(view: str, *parts) -> str:
+    return ":".join(["entry", view] + [str(part) for part in parts])
+
+
+async def render_listing(view: str, page: int = 1, cursor: Optional[PageCursor] = None, entry: bool = False) -> Optional[RenderedPage]:
+    spec = LISTING_VIEWS[view]
+    offset = 0 if cursor is not None else (page - 1) * RESULTS_PER_PAGE
+    result = await fetch_page(cursor=cursor, limit=RESULTS_PER_PAGE, offset=offset, **spec.filters)
+    if not result.videos:
+        return None
+
+    if entry:
+        header = f"{spec.entry_title} ({result.total} всего)"
+    else:
+        header = f"{spec.title} (страница {page})"
+    prev_cursor, _, next_cursor = result.cursors
+    keyboard = spec.keyboard(page=page, total_pages=result.total_pages(RESULTS_PER_PAGE), prev_cursor=prev_cursor, next_cursor=next_cursor)
+    return RenderedPage(f"{header}\n\n" + render_cards(result.videos), keyboard)
+
+
+async def render_filtered_concerts(quality_filter: Optional[str]) -> Optional[RenderedPage]:
+    result = await fetch_page(content_type=CONTENT_TYPE_CONCERT, quality_filter=quality_filter, limit=RESULTS_PER_PAGE)
+    if not result.videos:
+        return None
+
+    filter_name = quality_filter if quality_filter else "Все"
+    text = f"🎸 **Концерты Metallica** (фильтр: {filter_name})\n\n" + render_cards(result.videos)
+    return RenderedPage(text, get_concerts_keyboard(page=1, total_pages=result.total_pages(RESULTS_PER_PAGE)))
+
+
+async def render_tour(tour_name: str, page: int = 1, cursor: Optional[PageCursor] = None) -> Optional[RenderedPage]:
+    offset = 0 if cursor is not None else (page - 1) * RESULTS_PER_PAGE
+    result = await fetch_page(cursor=cursor, tour_name=tour_name, limit=RESULTS_PER_PAGE, offset=offset)
+    if not result.videos:
+        return None
+
+    text = f"🎫 **{tour_name}** ({result.total} записей)\n\n" + render_cards(result.videos)
+    prev_cursor, _, next_cursor = result.cursors
+    keyboard = get_tour_paging_keyboard(tour_name, page, result.total_pages(RESULTS_PER_PAGE), prev_cursor=prev_cursor, next_cursor=next_cursor)
+    return RenderedPage(text, keyboard)
+
+
+async def render_year(
+    year: int,
+    concert_page: int = 1,
+    concert_cursor: Optional[PageCursor] = None,
+    interview_page: int = 1,
+    interview_cursor: Optional[PageCursor] = None
+) -> Optional[RenderedPage]:
+    facets = await fetch_year_facets(
+        year,
+        {CONTENT_TYPE_CONCERT: concert_cursor, CONTENT_TYPE_INTERVIEW: interview_cursor},
+        offsets={
+            CONTENT_TYPE_CONCERT: 0 if concert_cursor else (concert_page - 1) * RESULTS_PER_PAGE,
+            CONTENT_TYPE_INTERVIEW: 0 if interview_cursor else (interview_page - 1) * RESULTS_PER_PAGE,
+        },
+        limit=RESULTS_PER_PAGE
+    )
+    concerts, interviews = facets[CONTENT_TYPE_CONCERT], facets[CONTENT_TYPE_INTERVIEW]
+    if not concerts.videos and not interviews.videos:
+        return None
+
+    text = f"📅 **Metallica {year}** ({concerts.total + interviews.total} записей)\n\n"
+    if concerts.videos:
+        text += f"🎸 **Концерты** ({concerts.total})\n\n" + render_cards(concerts.videos)
+    if interviews.videos:
+        text += f"🎤 **Интервью** ({interviews.total})\n\n" + render_cards(interviews.videos)
+
+    keyboard = get_year_paging_keyboard(
+        year, concert_page, concerts.total_pages(RESULTS_PER_PAGE), interview_page, interviews.total_pages(RESULTS_PER_PAGE),
+        concert_cursors=concerts.cursors, interview_cursors=interviews.cursors
+    )
+    return RenderedPage(text, keyboard)
+
+
+def _next_callback(rendered: RenderedPage) -> Optional[str]:
+    for row in rendered.reply_markup.inline_keyboard:
+        for button in row:
+            if button.text == NEXT_BUTTON_TEXT:
+                return button.callback_data
+    return None
+
+
+async def warm_pages(pages_per_view: int = PAGE_WARM_COUNT) -> int:
+    """Drop rendered pages and pre-render the first pages of each listing.
+
+    The warmer walks the same "next" buttons a user would press, so every
+    page it stores sits under the exact key the handler will look up.
+    """
+    store = get_page_store()
+    store.clear()
+    warmed = 0
+    for view in LISTING_VIEWS:
+        rendered = await store.get_or_render(entry_key(view), lambda view=view: render_listing(view, entry=True))
+        for _ in range(pages_per_view - 1):
+            data = _next_callback(rendered) if rendered else None
+            if data is None:
+                break
+            page, cursor = parse_page_callback(data)
+            rendered = await store.get_or_render(data, lambda view=view, page=page, cursor=cursor: render_listing(view, page, cursor))
+            warmed += 1
+        warmed += 1
+    return warmed
@@ -0,0 +1,97 @@
+import asyncio
+import logging
+from typing import List, Optional
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler
+
+from bot.config import WEBHOOK_DEDUP_TTL, WEBHOOK_QUEUE_SIZE, WEBHOOK_WORKERS
+from database.cache import LocalCache
+
+logger = logging.getLogger(__name__)
+
+DEDUP_MAX_ENTRIES = 10000
+
+
+class QueuedRequestHandler(SimpleRequestHandler):
+    """Webhook handler that acknowledges updates at once and processes them from a bounded queue.
+
+    Telegram redelivers an update when the acknowledgement is late or lost, so
+    update ids seen within the dedup window are acknowledged and dropped. When
+    the queue is full the update is refused with 503 and Telegram retries it
+    later, which keeps a burst from turning into unbounded tasks.
+    """
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        secret_token: Optional[str] = None,
+        queue_size: int = WEBHOOK_QUEUE_SIZE,
+        workers: int = WEBHOOK_WORKERS,
+        dedup_ttl: float = WEBHOOK_DEDUP_TTL
+    ):
+        super().__init__(dispatcher, bot, handle_in_background=False, secret_token=secret_token)
+        self.queue: "asyncio.Queue[Update]" = asyncio.Queue(maxsize=queue_size)
+        self.workers = workers
+        self.seen = LocalCache(DEDUP_MAX_ENTRIES, dedup_ttl)
+        self._tasks: List[asyncio.Task] = []
+        self.accepted = 0
+        self.duplicates = 0
+        self.rejected = 0
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await super().close()
+
+    async def _worker(self):
+        while True:
+            update = await self.queue.get()
+            try:
+                await self.dispatcher.feed_update(self.bot, update, **self.data)
+            except Exception:
+                logger.exception("Failed to process update %s", update.update_id)
+            finally:
+                self.queue.task_done()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if not self.verify_secret(request.headers.get("X-Telegram-Bot-Api-Secret-Token", ""), self.bot):
+            return web.Response(body="Unauthorized", status=401)
+
+        try:
+            payload = await request.json(loads=self.bot.session.json_loads)
+            update = Update.model_validate(payload, context={"bot": self.bot})
+        except ValueError:
+            return web.Response(body="Bad Request", status=400)
+
+        key = str(update.update_id)
+        if self.seen.get(key) is not None:
+            self.duplicates += 1
+            return web.json_response({})
+
+        try:
+            self.queue.put_nowait(update)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return web.Response(body="Busy", status=503)
+
+        self.seen.set(key, True)
+        self.accepted += 1
+        return web.json_response({})
+
+    def stats(self):
+        return {
+            "queued": self.queue.qsize(),
+            "accepted": self.accepted,
+            "duplicates": self.duplicates,
+            "rejected": self.rejected,
+        }
@@ -1,6 +1,6 @@
 from database.models import init_db, Base, engine
-from database.repository import VideoRepository, TourRepository, SyncStatusRepository, SearchHistoryRepository
-from database.cache import Cache, get_cache, get_cached_video_list, set_cached_video_list
+from database.repository import VideoRepository, TourRepository, SyncStatusRepository, SearchHistoryRepository, QueryWatermarkRepository, ArchiveProgressRepository, QuotaUsageRepository
+from database.cache import Cache, get_cache, get_cached_video_list, set_cached_video_list, read_through, invalidate_pages
 
 __all__ = [
     "init_db",
@@ -9,8 +9,13 @@ __all__ = [
     "TourRepository", 
     "SyncStatusRepository",
     "SearchHistoryRepository",
+    "QueryWatermarkRepository",
+    "ArchiveProgressRepository",
+    "QuotaUsageRepository",
     "Cache",
     "get_cache",
     "get_cached_video_list",
     "set_cached_video_list",
+    "read_through",
+    "invalidate_pages",
 ]
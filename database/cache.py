@@ -1,47 +1,399 @@
+import asyncio
 import json
-from typing import Optional, Any
+import time
+import zlib
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+from typing import Optional, Any, Awaitable, Callable, Dict, Iterable, List, Sequence, Set, Tuple
 import redis.asyncio as redis
-from bot.config import REDIS_URL
+from redis.exceptions import RedisError
+
+from utils.circuit_breaker import CircuitBreaker
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+from bot.config import (
+    REDIS_URL, PAGE_CACHE_ENABLED, PAGE_CACHE_TTL,
+    LOCAL_CACHE_MAX_ENTRIES, LOCAL_CACHE_TTL, CACHE_GENERATION_TTL,
+    REDIS_FAILURE_THRESHOLD, REDIS_RETRY_SECONDS, REDIS_SOCKET_TIMEOUT,
+    CACHE_SWEEP_BATCH, CACHE_CODEC, CACHE_COMPRESSION, CACHE_COMPRESS_THRESHOLD
+)
+
+CATALOG_GENERATION_KEY = "catalog:generation"
+TAG_KEY_PREFIX = "tag:"
+PAGE_KEY_PREFIX = "pages:"
+
+def tag_key(tag: str) -> str:
+    return f"{TAG_KEY_PREFIX}{tag}"
+
+_MISSING = object()
+
+# Bump whenever the shape of cached values changes (e.g. read_model.CARD_FIELDS);
+# entries written under another version are treated as misses.
+CACHE_SCHEMA_VERSION = 1
+
+ENVELOPE_MAGIC = b"\xca"
+
+class CodecError(ValueError):
+    pass
+
+class JsonCodec:
+    name = "json"
+    tag = b"j"
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode()
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+class MsgpackCodec:
+    name = "msgpack"
+    tag = b"m"
+
+    def dumps(self, value: Any) -> bytes:
+        return msgpack.packb(value, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+class ZlibCompressor:
+    name = "zlib"
+    tag = b"z"
+
+    def compress(self, data: bytes) -> bytes:
+        return zlib.compress(data, 6)
+
+    def decompress(self, data: bytes) -> bytes:
+        return zlib.decompress(data)
+
+class ZstdCompressor:
+    name = "zstd"
+    tag = b"s"
+
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=3)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._decompressor.decompress(data)
+
+class Lz4Compressor:
+    name = "lz4"
+    tag = b"l"
+
+    def compress(self, data: bytes) -> bytes:
+        return lz4_frame.compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        return lz4_frame.decompress(data)
+
+def available_codecs() -> Dict[str, Any]:
+    codecs = {"json": JsonCodec}
+    if msgpack is not None:
+        codecs["msgpack"] = MsgpackCodec
+    return codecs
+
+def available_compressors() -> Dict[str, Any]:
+    compressors = {"zlib": ZlibCompressor}
+    if zstandard is not None:
+        compressors["zstd"] = ZstdCompressor
+    if lz4_frame is not None:
+        compressors["lz4"] = Lz4Compressor
+    return compressors
+
+class Envelope:
+    """Binary framing for cached values: magic, schema version, codec, compression, body.
+
+    The codec and compressor are recorded per entry, so readers decode values
+    written by instances configured differently.
+    """
+
+    def __init__(self, codec: str = CACHE_CODEC, compression: str = CACHE_COMPRESSION, threshold: int = CACHE_COMPRESS_THRESHOLD):
+        codecs = available_codecs()
+        compressors = available_compressors()
+        codec_class = codecs.get(codec) or codecs.get("msgpack") or JsonCodec
+        self.codec = codec_class()
+        if compression == "none":
+            self.compressor = None
+        else:
+            preferred = compressors.get(compression) or compressors.get("zstd") or compressors.get("lz4") or ZlibCompressor
+            self.compressor = preferred()
+        self.threshold = threshold
+        self._codecs = {cls.tag: cls() for cls in codecs.values()}
+        self._compressors = {cls.tag: cls() for cls in compressors.values()}
+
+    def dumps(self, value: Any) -> bytes:
+        body = self.codec.dumps(value)
+        compression = b"n"
+        if self.compressor is not None and len(body) >= self.threshold:
+            body = self.compressor.compress(body)
+            compression = self.compressor.tag
+        return ENVELOPE_MAGIC + bytes([CACHE_SCHEMA_VERSION]) + self.codec.tag + compression + body
+
+    def loads(self, data: bytes) -> Any:
+        if len(data) < 4 or data[:1] != ENVELOPE_MAGIC:
+            raise CodecError("not an envelope")
+        if data[1] != CACHE_SCHEMA_VERSION:
+            raise CodecError(f"schema version {data[1]} != {CACHE_SCHEMA_VERSION}")
+        codec = self._codecs.get(data[2:3])
+        compression = data[3:4]
+        if codec is None:
+            raise CodecError(f"codec {data[2:3]!r} is not installed")
+        body = data[4:]
+        compressor = None
+        if compression != b"n":
+            compressor = self._compressors.get(compression)
+            if compressor is None:
+                raise CodecError(f"compression {compression!r} is not installed")
+        # Each library has its own error types (zlib.error, ZstdError, msgpack's); callers only need "unreadable".
+        try:
+            if compressor is not None:
+                body = compressor.decompress(body)
+            return codec.loads(body)
+        except Exception as e:
+            raise CodecError(f"corrupt entry: {e!r}") from e
+
+class LocalCache:
+    """Bounded in-process LRU with per-entry expiry."""
+
+    def __init__(self, max_entries: int = LOCAL_CACHE_MAX_ENTRIES, ttl: float = LOCAL_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, expire: Optional[float] = None):
+        ttl = self.ttl if expire is None else min(expire, self.ttl)
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    def delete_pattern(self, pattern: str):
+        for key in [key for key in self._entries if fnmatchcase(key, pattern)]:
+            del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
 
 class Cache:
+    """Two-tier cache: an in-process LRU in front of Redis.
+
+    Redis errors never reach callers. After a few consecutive failures the
+    breaker opens and the cache runs memory-only until a probe succeeds.
+    """
+
     def __init__(self):
         self.redis_url = REDIS_URL
         self._client: Optional[redis.Redis] = None
-    
+        self.local = LocalCache()
+        self.breaker = CircuitBreaker(REDIS_FAILURE_THRESHOLD, REDIS_RETRY_SECONDS)
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.envelope = Envelope()
+        self._versions: Dict[str, int] = {}
+        self._pending_bumps: Set[str] = set()
+
     async def get_client(self) -> redis.Redis:
         if self._client is None:
-            self._client = redis.from_url(self.redis_url, decode_responses=True)
+            self._client = redis.from_url(
+                self.redis_url,
+                decode_responses=False,
+                socket_timeout=REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=REDIS_SOCKET_TIMEOUT
+            )
         return self._client
-    
+
+    @property
+    def redis_available(self) -> bool:
+        return self.breaker.state != CircuitBreaker.OPEN
+
+    async def _redis(self, operation: Callable[[redis.Redis], Awaitable[Any]], default: Any = None) -> Any:
+        if not self.breaker.allow():
+            return default
+        try:
+            client = await self.get_client()
+            result = await operation(client)
+        except (RedisError, OSError):
+            self.errors += 1
+            self.breaker.record_failure()
+            return default
+        if self.breaker.record_success():
+            await self._on_reattach()
+        return result
+
+    async def _on_reattach(self):
+        # Anything Redis holds may predate a sync that ran while it was away.
+        if self._pending_bumps:
+            keys, self._pending_bumps = sorted(self._pending_bumps), set()
+            self.local.clear()
+            await self.bump_versions(keys)
+
     async def get(self, key: str) -> Optional[str]:
-        client = await self.get_client()
-        return await client.get(key)
-    
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        value = await self._redis(lambda client: client.get(key))
+        if value is not None:
+            value = value.decode()
+            self.local.set(key, value)
+        return value
+
     async def set(self, key: str, value: str, expire: int = 3600):
-        client = await self.get_client()
-        await client.set(key, value, ex=expire)
-    
+        self.local.set(key, value, expire)
+        await self._redis(lambda client: client.set(key, value, ex=expire))
+
     async def set_json(self, key: str, value: Any, expire: int = 3600):
-        client = await self.get_client()
-        await client.set(key, json.dumps(value), ex=expire)
-    
+        self.local.set(key, value, expire)
+        await self._redis(lambda client: client.set(key, json.dumps(value), ex=expire))
+
     async def get_json(self, key: str) -> Optional[Any]:
-        client = await self.get_client()
-        data = await client.get(key)
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        data = await self._redis(lambda client: client.get(key))
         if data:
-            return json.loads(data)
+            value = json.loads(data)
+            self.local.set(key, value)
+            return value
         return None
-    
+
+    async def set_object(self, key: str, value: Any, expire: int = 3600):
+        self.local.set(key, value, expire)
+        payload = self.envelope.dumps(value)
+        await self._redis(lambda client: client.set(key, payload, ex=expire))
+
+    async def get_object(self, key: str) -> Optional[Any]:
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        data = await self._redis(lambda client: client.get(key))
+        if not data:
+            return None
+        try:
+            value = self.envelope.loads(data)
+        except (CodecError, ValueError):
+            return None
+        self.local.set(key, value)
+        return value
+
     async def delete(self, key: str):
-        client = await self.get_client()
-        await client.delete(key)
-    
+        self.local.delete(key)
+        await self._redis(lambda client: client.delete(key))
+
+    async def sweep(self, pattern: str, keep: Optional[Callable[[str], bool]] = None, batch: int = CACHE_SWEEP_BATCH) -> int:
+        """Delete matching keys with SCAN + UNLINK, one small batch at a time.
+
+        Unlike KEYS this never holds Redis for a whole-keyspace walk, and UNLINK
+        frees the values in a background thread.
+        """
+        self.local.delete_pattern(pattern)
+
+        async def sweep(client: redis.Redis) -> int:
+            removed = 0
+            doomed: List[str] = []
+            async for key in client.scan_iter(match=pattern, count=batch):
+                key = key.decode() if isinstance(key, bytes) else key
+                if keep is not None and keep(key):
+                    continue
+                doomed.append(key)
+                if len(doomed) >= batch:
+                    removed += await client.unlink(*doomed)
+                    doomed = []
+                    await asyncio.sleep(0)
+            if doomed:
+                removed += await client.unlink(*doomed)
+            return removed
+
+        return await self._redis(sweep, default=0)
+
     async def clear_pattern(self, pattern: str):
-        client = await self.get_client()
-        keys = await client.keys(pattern)
-        if keys:
-            await client.delete(*keys)
-    
+        await self.sweep(pattern)
+
+    async def get_versions(self, keys: Sequence[str]) -> List[int]:
+        """Current counters for generation/tag keys, cached locally for CACHE_GENERATION_TTL."""
+        missing = [key for key in keys if self.local.get(key) is None]
+        if missing:
+            values = await self._redis(lambda client: client.mget(missing), default=_MISSING)
+            for key, value in zip(missing, values if values is not _MISSING else []):
+                self._versions[key] = int(value or 0)
+            for key in missing:
+                self.local.set(key, self._versions.get(key, 0), CACHE_GENERATION_TTL)
+        return [self.local.get(key, self._versions.get(key, 0)) for key in keys]
+
+    async def bump_versions(self, keys: Iterable[str]) -> Dict[str, int]:
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+
+        async def incr_all(client: redis.Redis) -> List[int]:
+            async with client.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.incr(key)
+                return await pipe.execute()
+
+        values = await self._redis(incr_all)
+        if values is None:
+            self._pending_bumps.update(keys)
+            values = [self._versions.get(key, 0) + 1 for key in keys]
+        for key, value in zip(keys, values):
+            self._versions[key] = int(value)
+            self.local.set(key, int(value), CACHE_GENERATION_TTL)
+        return dict(zip(keys, values))
+
+    async def get_generation(self) -> int:
+        return (await self.get_versions([CATALOG_GENERATION_KEY]))[0]
+
+    async def bump_generation(self) -> int:
+        self.local.clear()
+        return (await self.bump_versions([CATALOG_GENERATION_KEY]))[CATALOG_GENERATION_KEY]
+
+    async def bump_tags(self, tags: Iterable[str]) -> Dict[str, int]:
+        return await self.bump_versions(tag_key(tag) for tag in tags)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "local_entries": len(self.local),
+            "redis": self.breaker.state
+        }
+
     async def close(self):
         if self._client:
             await self._client.close()
@@ -56,8 +408,59 @@ def get_cache() -> Cache:
 
 async def get_cached_video_list(key: str) -> Optional[list]:
     cache = get_cache()
-    return await cache.get_json(f"videos:{key}")
+    return await cache.get_object(f"videos:{key}")
 
 async def set_cached_video_list(key: str, videos: list, expire: int = 1800):
     cache = get_cache()
-    await cache.set_json(f"videos:{key}", videos, expire)
+    await cache.set_object(f"videos:{key}", videos, expire)
+
+async def read_through(
+    view: str,
+    params: str,
+    loader: Callable[[], Awaitable[Any]],
+    encode: Callable[[Any], Any],
+    decode: Callable[[Any], Any],
+    tags: Sequence[str] = (),
+    expire: int = PAGE_CACHE_TTL
+) -> Any:
+    """Serve a listing result from the cache, loading and storing it on a miss.
+
+    Keys carry the catalog generation and the version of every tag the entry
+    depends on. Bumping a tag retires just the pages that carry it; bumping
+    the generation retires all of them. Old keys are never read again and
+    expire on their own.
+    """
+    if not PAGE_CACHE_ENABLED:
+        return await loader()
+
+    cache = get_cache()
+    versions = await cache.get_versions([CATALOG_GENERATION_KEY] + [tag_key(tag) for tag in tags])
+    tag_versions = ".".join(str(version) for version in versions[1:])
+    key = f"{PAGE_KEY_PREFIX}{versions[0]}:{view}:{tag_versions}:{params}"
+    data = await cache.get_object(key)
+
+    if data is not None:
+        cache.hits += 1
+        return decode(data)
+
+    cache.misses += 1
+    value = await loader()
+    await cache.set_object(key, encode(value), expire)
+    return value
+
+async def invalidate_pages(tags: Optional[Iterable[str]] = None) -> Dict[str, int]:
+    """Bump the given tags, or the whole catalog generation when no tags are given."""
+    cache = get_cache()
+    if tags is None:
+        return {CATALOG_GENERATION_KEY: await cache.bump_generation()}
+    return await cache.bump_tags(tags)
+
+async def drop_local_pages():
+    """Forget the in-process tier, so the next read sees version bumps another process made in Redis."""
+    get_cache().local.clear()
+
+async def sweep_stale_pages() -> int:
+    """Fallback cleanup: unlink cached pages from older catalog generations."""
+    cache = get_cache()
+    current = f"{PAGE_KEY_PREFIX}{await cache.get_generation()}:"
+    return await cache.sweep(f"{PAGE_KEY_PREFIX}*", keep=lambda key: key.startswith(current))
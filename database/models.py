@@ -1,9 +1,19 @@
 from datetime import datetime
 
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Date, BigInteger
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Date, BigInteger, Index, event, inspect, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 
+from bot.config import (
+    DATABASE_URL as CONFIGURED_DATABASE_URL,
+    DB_READ_POOL_SIZE,
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_CACHE_SIZE_KB,
+    SQLITE_MMAP_SIZE,
+)
+
 Base = declarative_base()
 
 
@@ -26,6 +36,8 @@ class Video(Base):
     tour_name = Column(String(100), index=True)
     venue = Column(String(200))
     date_event = Column(Date, index=True)
+    event_date = Column(Date)
+    event_year = Column(Integer)
     participants = Column(Text)
     quality_tags = Column(Text)
     search_query = Column(String(200))
@@ -34,6 +46,13 @@ class Video(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        Index("ix_videos_event_date_type", "event_date", "content_type"),
+        Index("ix_videos_type_event_date", "content_type", "event_date"),
+        Index("ix_videos_year_type_event_date", "event_year", "content_type", "event_date"),
+        Index("ix_videos_tour_event_date", "tour_name", "event_date", "content_type"),
+    )
+
 
 class Tour(Base):
     __tablename__ = "tours"
@@ -58,6 +77,43 @@ class SyncStatus(Base):
     error_message = Column(Text)
 
 
+class QueryWatermark(Base):
+    __tablename__ = "query_watermarks"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    query = Column(String(200), unique=True, nullable=False)
+    last_published_at = Column(DateTime)
+    # Oldest upload fetched by a date-ordered window that stopped before its last page;
+    # (last_published_at, resume_before) is the gap the next incremental run fills first,
+    # and resume_watermark (the newest upload that window saw) becomes the watermark once it is closed.
+    resume_before = Column(DateTime)
+    resume_watermark = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class ArchiveProgress(Base):
+    __tablename__ = "archive_progress"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    window = Column(String(300), unique=True, nullable=False)
+    crawled_at = Column(DateTime, default=datetime.utcnow)
+
+
+class QuotaUsage(Base):
+    __tablename__ = "quota_usage"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    day = Column(Date, nullable=False, index=True)
+    key_id = Column(String(32))
+    units = Column(Integer, default=0)
+    calls = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_quota_usage_day_key", "day", "key_id"),
+    )
+
+
 class SearchHistory(Base):
     __tablename__ = "search_history"
 
@@ -68,23 +124,183 @@ class SearchHistory(Base):
     searched_at = Column(DateTime, default=datetime.utcnow)
 
 
-DATABASE_URL = "sqlite+aiosqlite:///./data/metallica.db"
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+}
 
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=False,
-    future=True
-)
+
+def async_database_url(url: str) -> str:
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.drivername)
+    if driver:
+        parsed = parsed.set(drivername=driver)
+    return parsed.render_as_string(hide_password=False)
+
+
+def _is_sqlite_file(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def _sqlite_pragmas(read_only: bool):
+    pragmas = [
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}",
+        f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only=ON")
+    return pragmas
+
+
+def create_engine_for(url: str = CONFIGURED_DATABASE_URL, read_only: bool = False):
+    """Engine with the SQLite production profile applied on every new connection.
+
+    WAL lets readers keep going while the crawler writes. The writer pool holds a
+    single connection so writes queue in the pool instead of fighting over the
+    database lock; the reader pool is opened with query_only.
+    """
+    url = make_url(async_database_url(url))
+    options = {"echo": False, "future": True}
+
+    if _is_sqlite_file(url):
+        options["poolclass"] = AsyncAdaptedQueuePool
+        options["pool_size"] = DB_READ_POOL_SIZE if read_only else 1
+        options["max_overflow"] = 0
+        options["pool_timeout"] = max(SQLITE_BUSY_TIMEOUT_MS / 1000, 30)
+
+    async_engine = create_async_engine(url, **options)
+
+    if url.get_backend_name() == "sqlite":
+        pragmas = _sqlite_pragmas(read_only)
+
+        @event.listens_for(async_engine.sync_engine, "connect")
+        def _apply_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for pragma in pragmas:
+                cursor.execute(pragma)
+            cursor.close()
+
+    return async_engine
+
+
+DATABASE_URL = async_database_url(CONFIGURED_DATABASE_URL)
+
+engine = create_engine_for(DATABASE_URL)
+
+# An in-memory database only exists on the connection that created it, so
+# readers share the writer engine in that case.
+read_engine = create_engine_for(DATABASE_URL, read_only=True) if _is_sqlite_file(make_url(DATABASE_URL)) else engine
 
 AsyncSessionLocal = async_sessionmaker(
     engine,
     expire_on_commit=False
 )
 
+AsyncReadSessionLocal = async_sessionmaker(
+    read_engine,
+    expire_on_commit=False
+)
+
+
+async def dispose_engines():
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
+
+
+def _add_missing_columns(connection, table, columns):
+    existing = {column["name"] for column in inspect(connection).get_columns(table.name)}
+    for column in columns:
+        if column.name not in existing:
+            column_type = column.type.compile(dialect=connection.dialect)
+            connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+
+
+SEARCH_INDEX_TABLE = "videos_fts"
+SEARCH_INDEX_COLUMNS = ("title", "description", "venue", "tour_name", "channel_title")
+
+_SEARCH_INDEX_TRIGGERS = {
+    "videos_fts_ai": (
+        "AFTER INSERT ON videos BEGIN "
+        "INSERT INTO videos_fts(rowid, {columns}) VALUES (new.id, {new_values}); "
+        "END"
+    ),
+    "videos_fts_ad": (
+        "AFTER DELETE ON videos BEGIN "
+        "INSERT INTO videos_fts(videos_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+        "END"
+    ),
+    "videos_fts_au": (
+        "AFTER UPDATE OF {columns} ON videos BEGIN "
+        "INSERT INTO videos_fts(videos_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+        "INSERT INTO videos_fts(rowid, {columns}) VALUES (new.id, {new_values}); "
+        "END"
+    ),
+}
+
+
+def _create_search_index(connection):
+    """External-content FTS5 index over videos, kept in sync by triggers."""
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": SEARCH_INDEX_TABLE}
+    ).first()
+
+    columns = ", ".join(SEARCH_INDEX_COLUMNS)
+    if not exists:
+        connection.execute(text(
+            f"CREATE VIRTUAL TABLE {SEARCH_INDEX_TABLE} USING fts5("
+            f"{columns}, content='videos', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        ))
+
+    values = {
+        "columns": columns,
+        "new_values": ", ".join(f"new.{column}" for column in SEARCH_INDEX_COLUMNS),
+        "old_values": ", ".join(f"old.{column}" for column in SEARCH_INDEX_COLUMNS),
+    }
+    for name, body in _SEARCH_INDEX_TRIGGERS.items():
+        connection.execute(text(f"CREATE TRIGGER IF NOT EXISTS {name} {body.format(**values)}"))
+
+    if not exists:
+        connection.execute(text(f"INSERT INTO {SEARCH_INDEX_TABLE}({SEARCH_INDEX_TABLE}) VALUES ('rebuild')"))
+
+
+def _migrate_schema(connection):
+    videos = Video.__table__
+    _add_missing_columns(connection, videos, [videos.c.event_date, videos.c.event_year])
+
+    connection.execute(text(
+        "UPDATE videos SET event_date = coalesce(date_event, date(published_at)) "
+        "WHERE event_date IS NULL"
+    ))
+    connection.execute(text(
+        "UPDATE videos SET event_year = CAST(strftime('%Y', event_date) AS INTEGER) "
+        "WHERE event_year IS NULL AND event_date IS NOT NULL"
+    ))
+
+    for index in videos.indexes:
+        index.create(connection, checkfirst=True)
+
+    query_watermarks = QueryWatermark.__table__
+    _add_missing_columns(connection, query_watermarks, [query_watermarks.c.resume_before, query_watermarks.c.resume_watermark])
+
+    quota_usage = QuotaUsage.__table__
+    _add_missing_columns(connection, quota_usage, [quota_usage.c.key_id])
+    for index in quota_usage.indexes:
+        index.create(connection, checkfirst=True)
+
+    if connection.dialect.name == "sqlite":
+        _create_search_index(connection)
+
 
 async def init_db_async():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_migrate_schema)
 
 
 def init_db():
@@ -98,4 +314,8 @@ def init_db():
     if loop and loop.is_running():
         return asyncio.create_task(init_db_async())
 
-    asyncio.run(init_db_async())
+    async def _init_and_dispose():
+        await init_db_async()
+        await dispose_engines()
+
+    asyncio.run(_init_and_dispose())
@@ -0,0 +1,110 @@
+import re
+from dataclasses import dataclass, field
+from datetime import date
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, or_, tuple_
+
+SEEK_AFTER = "n"
+SEEK_BEFORE = "p"
+SEEK_AT = "a"
+
+CONTENT_TYPE_CODES = {"concert": "c", "interview": "i"}
+CONTENT_TYPE_NAMES = {code: name for name, code in CONTENT_TYPE_CODES.items()}
+
+CURSOR_PATTERN = re.compile(r"^([npa])([0-9a-z]*)\.([a-z]?)\.([0-9a-z]+)$")
+
+
+def _to_base36(value: int) -> str:
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    if value == 0:
+        return "0"
+    result = ""
+    while value:
+        value, remainder = divmod(value, 36)
+        result = digits[remainder] + result
+    return result
+
+
+@dataclass(frozen=True)
+class PageCursor:
+    event_date: Optional[date]
+    content_type: Optional[str]
+    id: int
+    direction: str = SEEK_AFTER
+
+    def encode(self) -> str:
+        date_part = _to_base36(self.event_date.toordinal()) if self.event_date else ""
+        type_part = CONTENT_TYPE_CODES.get(self.content_type or "", "")
+        return f"{self.direction}{date_part}.{type_part}.{_to_base36(self.id)}"
+
+    @classmethod
+    def decode(cls, token: Optional[str]) -> Optional["PageCursor"]:
+        if not token:
+            return None
+        match = CURSOR_PATTERN.match(token)
+        if not match:
+            return None
+        direction, date_part, type_part, id_part = match.groups()
+        try:
+            event_date = date.fromordinal(int(date_part, 36)) if date_part else None
+        except ValueError:
+            return None
+        return cls(event_date, CONTENT_TYPE_NAMES.get(type_part), int(id_part, 36), direction)
+
+    @classmethod
+    def from_video(cls, video, direction: str = SEEK_AFTER) -> "PageCursor":
+        return cls(video.event_date, video.content_type, video.id, direction)
+
+    @staticmethod
+    def is_token(value: str) -> bool:
+        return bool(CURSOR_PATTERN.match(value))
+
+    def seek_clause(self, entity):
+        if self.event_date is None:
+            key = tuple_(entity.content_type, entity.id)
+            bound = tuple_(self.content_type, self.id)
+            if self.direction == SEEK_BEFORE:
+                return and_(entity.event_date.is_(None), key < bound)
+            after = key >= bound if self.direction == SEEK_AT else key > bound
+            return or_(and_(entity.event_date.is_(None), after), entity.event_date.isnot(None))
+
+        key = tuple_(entity.event_date, entity.content_type, entity.id)
+        bound = tuple_(self.event_date, self.content_type, self.id)
+        if self.direction == SEEK_BEFORE:
+            return key < bound
+        if self.direction == SEEK_AT:
+            return key >= bound
+        return key > bound
+
+
+def page_cursors(videos: Sequence) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    if not videos:
+        return None, None, None
+    return (
+        PageCursor.from_video(videos[0], SEEK_BEFORE).encode(),
+        PageCursor.from_video(videos[0], SEEK_AT).encode(),
+        PageCursor.from_video(videos[-1], SEEK_AFTER).encode(),
+    )
+
+
+def sort_key(video) -> tuple:
+    return (
+        video.event_date is not None,
+        video.event_date or date.min,
+        video.content_type or "",
+        video.id
+    )
+
+
+@dataclass
+class VideoPage:
+    videos: List = field(default_factory=list)
+    total: int = 0
+
+    def total_pages(self, per_page: int) -> int:
+        return (self.total + per_page - 1) // per_page if self.total else 0
+
+    @property
+    def cursors(self) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        return page_cursors(self.videos)
@@ -0,0 +1,368 @@
+import asyncio
+import logging
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import select
+
+from bot.config import READ_MODEL_ENABLED, CATALOG_POLL_SECONDS
+from database.cache import read_through
+from database.models import AsyncReadSessionLocal, Video
+from database.pagination import PageCursor, VideoPage, SEEK_AT, SEEK_BEFORE, sort_key
+from database.repository import VideoRepository
+from database.singleflight import get_single_flight
+
+# Cached pages are stored as rows in this order; bump cache.CACHE_SCHEMA_VERSION when it changes.
+CARD_FIELDS = (
+    "id", "youtube_id", "title", "url", "duration_seconds", "content_type",
+    "quality_score", "is_official", "is_complete", "tour_name", "venue",
+    "date_event", "event_date", "event_year", "quality_tags",
+)
+
+QUALITY_PREDICATES = {
+    "HD": lambda snapshot, i: snapshot.quality_score[i] >= 60,
+    "OFFICIAL": lambda snapshot, i: bool(snapshot.is_official[i]),
+    "COMPLETE": lambda snapshot, i: bool(snapshot.is_complete[i]),
+}
+
+DATE_FIELDS = ("date_event", "event_date")
+
+FilterKey = Tuple[Optional[str], Optional[str], Optional[int], Optional[str]]
+CatalogVersion = Tuple[int, Optional[int], Optional[datetime]]
+
+logger = logging.getLogger(__name__)
+
+
+class VideoCard:
+    """The subset of Video a listing card and a page cursor need."""
+
+    __slots__ = CARD_FIELDS
+
+    def __init__(self, **values):
+        for name in CARD_FIELDS:
+            setattr(self, name, values.get(name))
+
+
+class CatalogSnapshot:
+    """Immutable, column-oriented copy of the catalog in listing order.
+
+    Every filter the bot offers maps to an array of row positions, so a page is
+    a bisect plus a slice. Positions are ascending, which keeps each index in
+    the same (event_date, content_type, id) order the database uses.
+    """
+
+    def __init__(self, rows: Sequence[tuple]):
+        columns = list(zip(*rows)) if rows else [()] * len(CARD_FIELDS)
+        values = dict(zip(CARD_FIELDS, columns))
+
+        self.size = len(rows)
+        self.id = array("q", values["id"])
+        self.quality_score = array("q", (score or 0 for score in values["quality_score"]))
+        self.duration_seconds = array("q", (seconds or 0 for seconds in values["duration_seconds"]))
+        self.is_official = bytes(bool(flag) for flag in values["is_official"])
+        self.is_complete = bytes(bool(flag) for flag in values["is_complete"])
+        self.youtube_id = list(values["youtube_id"])
+        self.title = list(values["title"])
+        self.url = list(values["url"])
+        self.content_type = list(values["content_type"])
+        self.tour_name = list(values["tour_name"])
+        self.venue = list(values["venue"])
+        self.date_event = list(values["date_event"])
+        self.event_date = list(values["event_date"])
+        self.event_year = list(values["event_year"])
+        self.quality_tags = list(values["quality_tags"])
+
+        self.sort_keys = [
+            (event_date is not None, event_date or date.min, content_type or "", video_id)
+            for event_date, content_type, video_id in zip(self.event_date, self.content_type, self.id)
+        ]
+        self._indexes: Dict[FilterKey, array] = {}
+        self._build_indexes()
+
+    def _build_indexes(self):
+        everything = array("I", range(self.size))
+        self._indexes[(None, None, None, None)] = everything
+
+        buckets: Dict[FilterKey, array] = {}
+        for i in range(self.size):
+            content_type, tour_name, year = self.content_type[i], self.tour_name[i], self.event_year[i]
+            keys = [(content_type, None, None, None)]
+            if year is not None:
+                keys.append((None, None, year, None))
+                keys.append((content_type, None, year, None))
+            if tour_name:
+                keys.append((None, tour_name, None, None))
+            for quality_filter, predicate in QUALITY_PREDICATES.items():
+                if predicate(self, i):
+                    keys.append((content_type, None, None, quality_filter))
+            for key in keys:
+                buckets.setdefault(key, array("I")).append(i)
+        self._indexes.update(buckets)
+
+    def card(self, i: int) -> VideoCard:
+        return VideoCard(**{name: getattr(self, name)[i] for name in CARD_FIELDS})
+
+    def index(
+        self,
+        content_type: Optional[str] = None,
+        tour_name: Optional[str] = None,
+        year: Optional[int] = None,
+        quality_filter: Optional[str] = None
+    ) -> array:
+        key = (content_type, tour_name, year, quality_filter)
+        positions = self._indexes.get(key)
+        if positions is None:
+            base = self._indexes.get((content_type, None, None, None)) if content_type else self._indexes[(None, None, None, None)]
+            positions = array("I", (
+                i for i in (base or ())
+                if (tour_name is None or self.tour_name[i] == tour_name)
+                and (year is None or self.event_year[i] == year)
+                and (quality_filter not in QUALITY_PREDICATES or QUALITY_PREDICATES[quality_filter](self, i))
+            ))
+            self._indexes[key] = positions
+        return positions
+
+    def page(
+        self,
+        cursor: Optional[PageCursor] = None,
+        content_type: Optional[str] = None,
+        tour_name: Optional[str] = None,
+        year: Optional[int] = None,
+        quality_filter: Optional[str] = None,
+        limit: int = 10,
+        offset: int = 0
+    ) -> VideoPage:
+        positions = self.index(content_type, tour_name, year, quality_filter)
+
+        if cursor is None:
+            start = offset
+            end = start + limit
+        elif cursor.direction == SEEK_BEFORE:
+            end = bisect_left(positions, bisect_left(self.sort_keys, sort_key(cursor)))
+            start = max(end - limit, 0)
+        else:
+            seek = bisect_left if cursor.direction == SEEK_AT else bisect_right
+            start = bisect_left(positions, seek(self.sort_keys, sort_key(cursor))) + offset
+            end = start + limit
+
+        return VideoPage([self.card(i) for i in positions[start:end]], len(positions))
+
+
+class CatalogReadModel:
+    def __init__(self, enabled: bool = READ_MODEL_ENABLED):
+        self.enabled = enabled
+        self.snapshot: Optional[CatalogSnapshot] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.snapshot is not None
+
+    async def load(self) -> Optional[CatalogSnapshot]:
+        if not self.enabled:
+            return None
+        columns = [getattr(Video, name) for name in CARD_FIELDS]
+        query = select(*columns).order_by(Video.event_date.asc(), Video.content_type.asc(), Video.id.asc())
+        async with AsyncReadSessionLocal() as session:
+            result = await session.execute(query)
+            rows = [tuple(row) for row in result.all()]
+        # Built off to the side and swapped in with a single assignment, so a
+        # handler either sees the old snapshot or the new one, never a mix.
+        self.snapshot = CatalogSnapshot(rows)
+        return self.snapshot
+
+    async def refresh(self) -> Optional[CatalogSnapshot]:
+        if not self.loaded:
+            return None
+        return await self.load()
+
+
+_read_model: Optional[CatalogReadModel] = None
+
+
+def get_read_model() -> CatalogReadModel:
+    global _read_model
+    if _read_model is None:
+        _read_model = CatalogReadModel()
+    return _read_model
+
+
+class CatalogWatcher:
+    """Runs the listeners once for every change to the videos table, whichever process made it.
+
+    Scheduled and one-off syncs run in their own processes and share only the
+    database with the bot, so the bot polls the catalog version; an in-process
+    sync calls check() directly instead of waiting for the next poll.
+    """
+
+    def __init__(self, interval: float = CATALOG_POLL_SECONDS):
+        self.interval = interval
+        self.version: Optional[CatalogVersion] = None
+        self.listeners: List[Callable[[], Awaitable[Any]]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def add_listener(self, listener: Callable[[], Awaitable[Any]]):
+        if listener not in self.listeners:
+            self.listeners.append(listener)
+
+    async def check(self) -> bool:
+        async with AsyncReadSessionLocal() as session:
+            version = await VideoRepository(session).get_catalog_version()
+        if version == self.version:
+            return False
+        # The first check only records where the catalog stands.
+        changed, self.version = self.version is not None, version
+        if changed:
+            for listener in self.listeners:
+                try:
+                    await listener()
+                except Exception:
+                    logger.exception("Catalog listener %s failed", getattr(listener, "__name__", listener))
+        return changed
+
+    def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._poll())
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check()
+            except Exception:
+                logger.exception("Catalog change check failed")
+
+
+_catalog_watcher: Optional[CatalogWatcher] = None
+
+
+def get_catalog_watcher() -> CatalogWatcher:
+    global _catalog_watcher
+    if _catalog_watcher is None:
+        _catalog_watcher = CatalogWatcher()
+    return _catalog_watcher
+
+
+def encode_page(page: VideoPage) -> dict:
+    rows = []
+    for video in page.videos:
+        row = [getattr(video, name) for name in CARD_FIELDS]
+        rows.append([value.isoformat() if isinstance(value, date) else value for value in row])
+    return {"total": page.total, "videos": rows}
+
+
+def decode_page(payload: dict) -> VideoPage:
+    videos = []
+    for row in payload["videos"]:
+        values = dict(zip(CARD_FIELDS, row))
+        for name in DATE_FIELDS:
+            if values.get(name):
+                values[name] = date.fromisoformat(values[name])
+        videos.append(VideoCard(**values))
+    return VideoPage(videos, payload["total"])
+
+
+def listing_tags(
+    content_type: Optional[str] = None,
+    tour_name: Optional[str] = None,
+    year: Optional[int] = None
+) -> List[str]:
+    """Tags a cached listing depends on: one per filter it narrows by, or "all"."""
+    tags = []
+    if content_type:
+        tags.append(f"type:{content_type}")
+    if year:
+        tags.append(f"year:{year}")
+    if tour_name:
+        tags.append(f"tour:{tour_name}")
+    return tags or ["all"]
+
+
+def video_tags(videos: Iterable[Dict[str, Any]]) -> Set[str]:
+    """Every tag whose listings may show one of the given videos."""
+    tags = {"all"}
+    for video in videos:
+        event_date = VideoRepository._event_date(video)
+        if video.get("content_type"):
+            tags.add(f"type:{video['content_type']}")
+        if event_date:
+            tags.add(f"year:{event_date.year}")
+        if video.get("tour_name"):
+            tags.add(f"tour:{video['tour_name']}")
+    return tags
+
+
+def _cache_params(cursor: Optional[PageCursor], *parts) -> str:
+    return ":".join("" if part is None else str(part) for part in parts + (cursor.encode() if cursor else "",))
+
+
+async def fetch_page(
+    cursor: Optional[PageCursor] = None,
+    content_type: Optional[str] = None,
+    tour_name: Optional[str] = None,
+    year: Optional[int] = None,
+    quality_filter: Optional[str] = None,
+    limit: int = 10,
+    offset: int = 0
+) -> VideoPage:
+    """One listing page from the read model, or from SQLite through the Redis page cache.
+
+    The two are alternatives, not layers: a loaded snapshot answers from memory
+    faster than Redis could, so the page cache (``PAGE_CACHE_ENABLED``) and
+    single-flight below it are a fallback that only runs with
+    ``READ_MODEL_ENABLED=false``.
+    """
+    snapshot = get_read_model().snapshot
+    if snapshot is not None:
+        return snapshot.page(cursor, content_type, tour_name, year, quality_filter, limit, offset)
+
+    async def query() -> VideoPage:
+        async with AsyncReadSessionLocal() as session:
+            return await VideoRepository(session).get_page_with_count(
+                cursor, content_type, tour_name, year, quality_filter, limit, offset
+            )
+
+    params = _cache_params(cursor, content_type, tour_name, year, quality_filter, limit, offset)
+    tags = listing_tags(content_type, tour_name, year)
+
+    async def load() -> VideoPage:
+        return await get_single_flight().do(f"list:{params}", query)
+
+    return await read_through("list", params, load, encode_page, decode_page, tags=tags)
+
+
+async def fetch_year_facets(
+    year: int,
+    cursors: Dict[str, Optional[PageCursor]],
+    offsets: Optional[Dict[str, int]] = None,
+    limit: int = 10
+) -> Dict[str, VideoPage]:
+    offsets = offsets or {}
+    snapshot = get_read_model().snapshot
+    if snapshot is not None:
+        return {
+            content_type: snapshot.page(cursor, content_type=content_type, year=year, limit=limit, offset=offsets.get(content_type, 0))
+            for content_type, cursor in cursors.items()
+        }
+
+    async def query() -> Dict[str, VideoPage]:
+        async with AsyncReadSessionLocal() as session:
+            return await VideoRepository(session).get_year_facets(year, cursors, offsets=offsets, limit=limit)
+
+    params = ":".join(
+        [str(year), str(limit)]
+        + [_cache_params(cursor, content_type, offsets.get(content_type, 0)) for content_type, cursor in cursors.items()]
+    )
+
+    async def load() -> Dict[str, VideoPage]:
+        return await get_single_flight().do(f"year:{params}", query)
+
+    return await read_through(
+        "year",
+        params,
+        load,
+        lambda facets: {content_type: encode_page(page) for content_type, page in facets.items()},
+        lambda payload: {content_type: decode_page(page) for content_type, page in payload.items()},
+        tags=listing_tags(year=year)
+    )
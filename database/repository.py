@@ -1,11 +1,17 @@
 import json
 from datetime import datetime, date
-from typing import Optional, List, Dict, Any
-from sqlalchemy import select, func
+from typing import Optional, List, Dict, Any, Set, Sequence, Tuple
+from sqlalchemy import select, func, literal, union_all
+from sqlalchemy.orm import aliased
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from database.models import Video, Tour, SyncStatus, SearchHistory
+from database.models import Video, Tour, SyncStatus, SearchHistory, QueryWatermark, ArchiveProgress, QuotaUsage
+from database.pagination import PageCursor, VideoPage, SEEK_BEFORE, sort_key
+from database.search import videos_fts, build_match_query, match_clause, rank_expression
 
 class VideoRepository:
+    LOOKUP_CHUNK_SIZE = 500
+
     def __init__(self, session: AsyncSession):
         self.session = session
     
@@ -19,83 +25,322 @@ class VideoRepository:
         video = await self.get_by_youtube_id(youtube_id)
         return video is not None
     
+    async def get_known_youtube_ids(self) -> Set[str]:
+        result = await self.session.execute(select(Video.youtube_id))
+        return set(result.scalars().all())
+    
+    @staticmethod
+    def _event_date(video_data: Dict[str, Any]) -> Optional[date]:
+        if video_data.get('date_event'):
+            return video_data['date_event']
+        published_at = video_data.get('published_at')
+        if isinstance(published_at, datetime):
+            return published_at.date()
+        if isinstance(published_at, date):
+            return published_at
+        return None
+    
+    @classmethod
+    def _video_row(cls, video_data: Dict[str, Any]) -> Dict[str, Any]:
+        event_date = cls._event_date(video_data)
+        return {
+            'youtube_id': video_data['youtube_id'],
+            'title': video_data.get('title'),
+            'description': video_data.get('description'),
+            'url': video_data.get('url'),
+            'thumbnail_url': video_data.get('thumbnail_url'),
+            'duration_seconds': video_data.get('duration_seconds'),
+            'published_at': video_data.get('published_at'),
+            'view_count': video_data.get('view_count'),
+            'content_type': video_data.get('content_type'),
+            'quality_score': video_data.get('quality_score', 0),
+            'is_official': video_data.get('is_official', False),
+            'is_complete': video_data.get('is_complete', False),
+            'tour_name': video_data.get('tour_name'),
+            'venue': video_data.get('venue'),
+            'date_event': video_data.get('date_event'),
+            'event_date': event_date,
+            'event_year': event_date.year if event_date else None,
+            'participants': video_data.get('participants'),
+            'quality_tags': video_data.get('quality_tags'),
+            'search_query': video_data.get('search_query'),
+            'channel_id': video_data.get('channel_id'),
+            'channel_title': video_data.get('channel_title')
+        }
+    
     async def add_video(self, video_data: Dict[str, Any]) -> Video:
-        video = Video(
-            youtube_id=video_data['youtube_id'],
-            title=video_data.get('title'),
-            description=video_data.get('description'),
-            url=video_data.get('url'),
-            thumbnail_url=video_data.get('thumbnail_url'),
-            duration_seconds=video_data.get('duration_seconds'),
-            published_at=video_data.get('published_at'),
-            view_count=video_data.get('view_count'),
-            content_type=video_data.get('content_type'),
-            quality_score=video_data.get('quality_score', 0),
-            is_official=video_data.get('is_official', False),
-            is_complete=video_data.get('is_complete', False),
-            tour_name=video_data.get('tour_name'),
-            venue=video_data.get('venue'),
-            date_event=video_data.get('date_event'),
-            participants=video_data.get('participants'),
-            quality_tags=video_data.get('quality_tags'),
-            search_query=video_data.get('search_query'),
-            channel_id=video_data.get('channel_id'),
-            channel_title=video_data.get('channel_title')
-        )
+        video = Video(**self._video_row(video_data))
         self.session.add(video)
         await self.session.commit()
         await self.session.refresh(video)
         return video
     
     async def bulk_insert_videos(self, videos_data: List[Dict[str, Any]]) -> int:
-        count = 0
-        for video_data in videos_data:
-            if not await self.video_exists(video_data['youtube_id']):
-                await self.add_video(video_data)
-                count += 1
-        return count
+        result = await self.bulk_upsert_videos(videos_data)
+        return result["inserted"]
     
-    async def get_videos(
-        self,
+    async def bulk_upsert_videos(self, videos_data: List[Dict[str, Any]], update_existing: bool = False) -> Dict[str, int]:
+        rows = {video_data['youtube_id']: self._video_row(video_data) for video_data in videos_data}
+        if not rows:
+            return {"inserted": 0, "updated": 0}
+        
+        youtube_ids = list(rows)
+        try:
+            existing: Set[str] = set()
+            for start in range(0, len(youtube_ids), self.LOOKUP_CHUNK_SIZE):
+                chunk = youtube_ids[start:start + self.LOOKUP_CHUNK_SIZE]
+                result = await self.session.execute(
+                    select(Video.youtube_id).where(Video.youtube_id.in_(chunk))
+                )
+                existing.update(result.scalars().all())
+            
+            stmt = sqlite_insert(Video.__table__)
+            if update_existing:
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[Video.__table__.c.youtube_id],
+                    set_={
+                        "view_count": stmt.excluded.view_count,
+                        "quality_score": stmt.excluded.quality_score,
+                        "updated_at": datetime.utcnow()
+                    }
+                )
+            else:
+                stmt = stmt.on_conflict_do_nothing(index_elements=[Video.__table__.c.youtube_id])
+            
+            await self.session.execute(stmt, list(rows.values()))
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+        
+        return {
+            "inserted": len(youtube_ids) - len(existing),
+            "updated": len(existing) if update_existing else 0
+        }
+    
+    @staticmethod
+    def filter_clauses(
+        entity=Video,
         content_type: Optional[str] = None,
         tour_name: Optional[str] = None,
         year: Optional[int] = None,
-        quality_filter: Optional[str] = None,
-        sort_by: str = "date",
-        sort_order: str = "asc",
-        limit: int = 10,
-        offset: int = 0
-    ) -> List[Video]:
-        query = select(Video)
-        date_expr = func.coalesce(Video.date_event, func.date(Video.published_at))
-        
+        quality_filter: Optional[str] = None
+    ) -> list:
+        clauses = []
         if content_type:
-            query = query.where(Video.content_type == content_type)
+            clauses.append(entity.content_type == content_type)
         if tour_name:
-            query = query.where(Video.tour_name == tour_name)
+            clauses.append(entity.tour_name == tour_name)
         if year:
-            query = query.where(func.strftime('%Y', date_expr) == str(year))
+            clauses.append(entity.event_year == year)
         if quality_filter:
             if quality_filter == "HD":
-                query = query.where(Video.quality_score >= 60)
+                clauses.append(entity.quality_score >= 60)
             elif quality_filter == "OFFICIAL":
-                query = query.where(Video.is_official == True)
+                clauses.append(entity.is_official == True)
             elif quality_filter == "COMPLETE":
-                query = query.where(Video.is_complete == True)
+                clauses.append(entity.is_complete == True)
+        return clauses
+    
+    @classmethod
+    def listing_query(
+        cls,
+        content_type: Optional[str] = None,
+        tour_name: Optional[str] = None,
+        year: Optional[int] = None,
+        quality_filter: Optional[str] = None,
+        sort_by: str = "date",
+        sort_order: str = "asc"
+    ):
+        query = select(Video).where(*cls.filter_clauses(Video, content_type, tour_name, year, quality_filter))
         
         order_desc = sort_order.lower() == "desc"
         if sort_by == "date":
-            query = query.order_by(date_expr.desc() if order_desc else date_expr.asc(), Video.content_type.asc())
+            if order_desc:
+                query = query.order_by(Video.event_date.desc(), Video.content_type.desc(), Video.id.desc())
+            else:
+                query = query.order_by(Video.event_date.asc(), Video.content_type.asc(), Video.id.asc())
         elif sort_by == "quality_score":
             query = query.order_by(Video.quality_score.desc())
         elif sort_by == "view_count":
             query = query.order_by(Video.view_count.desc())
-        
+        return query
+    
+    @classmethod
+    def count_query(
+        cls,
+        content_type: Optional[str] = None,
+        tour_name: Optional[str] = None,
+        year: Optional[int] = None,
+        quality_filter: Optional[str] = None
+    ):
+        return select(func.count(Video.id)).where(*cls.filter_clauses(Video, content_type, tour_name, year, quality_filter))
+    
+    async def get_videos(
+        self,
+        content_type: Optional[str] = None,
+        tour_name: Optional[str] = None,
+        year: Optional[int] = None,
+        quality_filter: Optional[str] = None,
+        sort_by: str = "date",
+        sort_order: str = "asc",
+        limit: int = 10,
+        offset: int = 0
+    ) -> List[Video]:
+        query = self.listing_query(content_type, tour_name, year, quality_filter, sort_by, sort_order)
         query = query.limit(limit).offset(offset)
         
         result = await self.session.execute(query)
         return list(result.scalars().all())
     
+    @classmethod
+    def total_subquery(
+        cls,
+        content_type: Optional[str] = None,
+        tour_name: Optional[str] = None,
+        year: Optional[int] = None,
+        quality_filter: Optional[str] = None
+    ):
+        counted = aliased(Video)
+        return (
+            select(func.count(counted.id))
+            .where(*cls.filter_clauses(counted, content_type, tour_name, year, quality_filter))
+            .scalar_subquery()
+        )
+    
+    @classmethod
+    def page_query(
+        cls,
+        cursor: Optional[PageCursor] = None,
+        content_type: Optional[str] = None,
+        tour_name: Optional[str] = None,
+        year: Optional[int] = None,
+        quality_filter: Optional[str] = None,
+        limit: int = 10,
+        offset: int = 0,
+        with_total: bool = True
+    ):
+        backwards = cursor is not None and cursor.direction == SEEK_BEFORE
+        query = cls.listing_query(content_type, tour_name, year, quality_filter, sort_order="desc" if backwards else "asc")
+        if with_total:
+            query = query.add_columns(cls.total_subquery(content_type, tour_name, year, quality_filter).label("total"))
+        if cursor is not None:
+            query = query.where(cursor.seek_clause(Video))
+        return query.limit(limit).offset(offset)
+    
+    async def get_page_with_count(
+        self,
+        cursor: Optional[PageCursor] = None,
+        content_type: Optional[str] = None,
+        tour_name: Optional[str] = None,
+        year: Optional[int] = None,
+        quality_filter: Optional[str] = None,
+        limit: int = 10,
+        offset: int = 0
+    ) -> VideoPage:
+        return await self._fetch_page(cursor, dict(content_type=content_type, tour_name=tour_name, year=year, quality_filter=quality_filter), limit, offset)
+    
+    async def _fetch_page(
+        self,
+        cursor: Optional[PageCursor],
+        filters: Dict[str, Any],
+        limit: int,
+        offset: int = 0
+    ) -> VideoPage:
+        result = await self.session.execute(self.page_query(cursor, limit=limit, offset=offset, **filters))
+        rows = result.all()
+        videos = [row[0] for row in rows]
+        total = rows[0][1] if rows else None
+        
+        if cursor is not None and cursor.direction == SEEK_BEFORE:
+            if len(videos) < limit and cursor.event_date is not None:
+                query = self.listing_query(sort_order="desc", **filters)
+                result = await self.session.execute(
+                    query.where(Video.event_date.is_(None)).limit(limit - len(videos))
+                )
+                videos.extend(result.scalars().all())
+            videos.reverse()
+        
+        if total is None:
+            total = await self.get_videos_count(**filters) if cursor is not None or offset else 0
+        return VideoPage(videos, total or 0)
+    
+    @classmethod
+    def search_query(cls, expression: str, content_type: Optional[str] = None, limit: int = 10, offset: int = 0):
+        matches = (
+            select(videos_fts.c.rowid, rank_expression().label("rank"))
+            .where(match_clause(expression))
+            .subquery()
+        )
+        return (
+            select(Video, func.count().over().label("total"))
+            .join(matches, matches.c.rowid == Video.id)
+            .where(*cls.filter_clauses(Video, content_type))
+            .order_by(matches.c.rank, Video.id)
+            .limit(limit)
+            .offset(offset)
+        )
+    
+    async def search_videos(
+        self,
+        query: str,
+        content_type: Optional[str] = None,
+        limit: int = 10,
+        offset: int = 0
+    ) -> VideoPage:
+        expression = build_match_query(query)
+        if expression is None:
+            return VideoPage()
+        
+        result = await self.session.execute(self.search_query(expression, content_type, limit, offset))
+        rows = result.all()
+        if rows:
+            return VideoPage([row[0] for row in rows], rows[0][1])
+        if not offset:
+            return VideoPage()
+        
+        counted = (
+            select(func.count(Video.id))
+            .join(videos_fts, videos_fts.c.rowid == Video.id)
+            .where(match_clause(expression), *self.filter_clauses(Video, content_type))
+        )
+        total = await self.session.execute(counted)
+        return VideoPage([], total.scalar() or 0)
+    
+    async def get_year_facets(
+        self,
+        year: int,
+        cursors: Dict[str, Optional[PageCursor]],
+        offsets: Optional[Dict[str, int]] = None,
+        limit: int = 10
+    ) -> Dict[str, VideoPage]:
+        offsets = offsets or {}
+        parts = []
+        for content_type, cursor in cursors.items():
+            query = self.page_query(cursor, content_type=content_type, year=year, limit=limit, offset=offsets.get(content_type, 0))
+            parts.append(select(query.add_columns(literal(content_type).label("facet")).subquery()))
+        
+        combined = union_all(*parts).subquery()
+        facet_video = aliased(Video, combined)
+        result = await self.session.execute(select(facet_video, combined.c.total, combined.c.facet))
+        
+        pages = {content_type: VideoPage() for content_type in cursors}
+        for video, total, facet in result.all():
+            pages[facet].videos.append(video)
+            pages[facet].total = total
+        
+        for content_type, page in pages.items():
+            page.videos.sort(key=sort_key)
+            if not page.videos and (cursors[content_type] is not None or offsets.get(content_type)):
+                page.total = await self.get_videos_count(content_type=content_type, year=year)
+        return pages
+    
+    async def get_counts_by_type(self) -> Dict[str, int]:
+        result = await self.session.execute(
+            select(Video.content_type, func.count(Video.id)).group_by(Video.content_type)
+        )
+        return {content_type: count for content_type, count in result.all()}
+    
     async def get_videos_count(
         self,
         content_type: Optional[str] = None,
@@ -103,26 +348,14 @@ class VideoRepository:
         year: Optional[int] = None,
         quality_filter: Optional[str] = None
     ) -> int:
-        query = select(func.count(Video.id))
-        date_expr = func.coalesce(Video.date_event, func.date(Video.published_at))
-        
-        if content_type:
-            query = query.where(Video.content_type == content_type)
-        if tour_name:
-            query = query.where(Video.tour_name == tour_name)
-        if year:
-            query = query.where(func.strftime('%Y', date_expr) == str(year))
-        if quality_filter:
-            if quality_filter == "HD":
-                query = query.where(Video.quality_score >= 60)
-            elif quality_filter == "OFFICIAL":
-                query = query.where(Video.is_official == True)
-            elif quality_filter == "COMPLETE":
-                query = query.where(Video.is_complete == True)
-        
-        result = await self.session.execute(query)
+        result = await self.session.execute(self.count_query(content_type, tour_name, year, quality_filter))
         return result.scalar() or 0
-    
+
+    async def get_catalog_version(self) -> Tuple[int, Optional[int], Optional[datetime]]:
+        """Row count, newest id and latest update: changes whenever any process saves or removes videos."""
+        result = await self.session.execute(select(func.count(Video.id), func.max(Video.id), func.max(Video.updated_at)))
+        return tuple(result.one())
+
     async def get_all_tours(self) -> List[str]:
         result = await self.session.execute(
             select(Video.tour_name).distinct().where(Video.tour_name.isnot(None))
@@ -130,14 +363,13 @@ class VideoRepository:
         return [t[0] for t in result.fetchall()]
     
     async def get_available_years(self) -> List[int]:
-        date_expr = func.coalesce(Video.date_event, func.date(Video.published_at))
         result = await self.session.execute(
-            select(func.strftime('%Y', date_expr))
+            select(Video.event_year)
             .distinct()
-            .where(date_expr.isnot(None))
-            .order_by(func.strftime('%Y', date_expr))
+            .where(Video.event_year.isnot(None))
+            .order_by(Video.event_year)
         )
-        return [int(t[0]) for t in result.fetchall() if t[0]]
+        return [t[0] for t in result.fetchall()]
 
 class TourRepository:
     def __init__(self, session: AsyncSession):
@@ -166,15 +398,20 @@ class SyncStatusRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
     
-    async def get_last_sync(self) -> Optional[SyncStatus]:
+    async def get_last_sync(self, sync_type: Optional[str] = None, exclude_types: Sequence[str] = ()) -> Optional[SyncStatus]:
+        query = select(SyncStatus)
+        if exclude_types:
+            query = query.where(SyncStatus.sync_type.notin_(list(exclude_types)))
+        if sync_type:
+            query = query.where(SyncStatus.sync_type == sync_type, SyncStatus.status == "completed")
         result = await self.session.execute(
-            select(SyncStatus).order_by(SyncStatus.id.desc()).limit(1)
+            query.order_by(SyncStatus.id.desc()).limit(1)
         )
         return result.scalar_one_or_none()
     
-    async def update_status(self, videos_added: int, status: str = "completed", error: Optional[str] = None):
+    async def update_status(self, videos_added: int, status: str = "completed", error: Optional[str] = None, sync_type: str = "youtube"):
         sync = SyncStatus(
-            sync_type="youtube",
+            sync_type=sync_type,
             last_sync=datetime.utcnow(),
             videos_added=videos_added,
             status=status,
@@ -183,11 +420,107 @@ class SyncStatusRepository:
         self.session.add(sync)
         await self.session.commit()
 
+class QueryWatermarkRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+    
+    async def get_watermarks(self) -> Dict[str, datetime]:
+        result = await self.session.execute(
+            select(QueryWatermark.query, QueryWatermark.last_published_at)
+            .where(QueryWatermark.last_published_at.isnot(None))
+        )
+        return {query: published_at for query, published_at in result.fetchall()}
+    
+    async def get_resume_points(self) -> Dict[str, Tuple[datetime, Optional[datetime]]]:
+        result = await self.session.execute(
+            select(QueryWatermark.query, QueryWatermark.resume_before, QueryWatermark.resume_watermark)
+            .where(QueryWatermark.resume_before.isnot(None))
+        )
+        return {query: (resume_before, resume_watermark) for query, resume_before, resume_watermark in result.fetchall()}
+    
+    async def update_watermarks(
+        self,
+        watermarks: Dict[str, datetime],
+        resume_points: Optional[Dict[str, Optional[Tuple[datetime, Optional[datetime]]]]] = None
+    ):
+        resume_points = resume_points or {}
+        queries = set(watermarks) | set(resume_points)
+        if not queries:
+            return
+        result = await self.session.execute(
+            select(QueryWatermark).where(QueryWatermark.query.in_(list(queries)))
+        )
+        existing = {row.query: row for row in result.scalars().all()}
+        
+        for query in queries:
+            row = existing.get(query)
+            if row is None:
+                row = QueryWatermark(query=query)
+                self.session.add(row)
+            published_at = watermarks.get(query)
+            if published_at is not None and (row.last_published_at is None or published_at > row.last_published_at):
+                row.last_published_at = published_at
+            if query in resume_points:
+                row.resume_before, row.resume_watermark = resume_points[query] or (None, None)
+        await self.session.commit()
+
+class ArchiveProgressRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+    
+    async def get_crawled(self) -> Dict[str, datetime]:
+        result = await self.session.execute(select(ArchiveProgress.window, ArchiveProgress.crawled_at))
+        return {window: crawled_at for window, crawled_at in result.fetchall()}
+    
+    async def mark_crawled(self, windows: List[str]):
+        if not windows:
+            return
+        now = datetime.utcnow()
+        result = await self.session.execute(
+            select(ArchiveProgress).where(ArchiveProgress.window.in_(windows))
+        )
+        existing = {row.window: row for row in result.scalars().all()}
+        for window in windows:
+            row = existing.get(window)
+            if row is None:
+                self.session.add(ArchiveProgress(window=window, crawled_at=now))
+            else:
+                row.crawled_at = now
+        await self.session.commit()
+
+class QuotaUsageRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+    
+    @staticmethod
+    def _key_clause(key_id: Optional[str]):
+        return QuotaUsage.key_id.is_(None) if key_id is None else QuotaUsage.key_id == key_id
+    
+    async def get_usage(self, day: date, key_id: Optional[str] = None) -> int:
+        result = await self.session.execute(
+            select(func.coalesce(func.sum(QuotaUsage.units), 0))
+            .where(QuotaUsage.day == day, self._key_clause(key_id))
+        )
+        return int(result.scalar_one())
+    
+    async def add_usage(self, day: date, units: int, calls: int, key_id: Optional[str] = None):
+        result = await self.session.execute(
+            select(QuotaUsage)
+            .where(QuotaUsage.day == day, self._key_clause(key_id))
+        )
+        row = result.scalars().first()
+        if row is None:
+            self.session.add(QuotaUsage(day=day, key_id=key_id, units=units, calls=calls))
+        else:
+            row.units = (row.units or 0) + units
+            row.calls = (row.calls or 0) + calls
+        await self.session.commit()
+
 class SearchHistoryRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
     
-    async def add_search(self, user_id: int, query: str, results_count: int):
+    async def add_search(self, user_id: int, query: str, results_count: int) -> SearchHistory:
         search = SearchHistory(
             user_id=user_id,
             query=query,
@@ -195,3 +528,7 @@ class SearchHistoryRepository:
         )
         self.session.add(search)
         await self.session.commit()
+        return search
+    
+    async def get_search(self, search_id: int) -> Optional[SearchHistory]:
+        return await self.session.get(SearchHistory, search_id)
@@ -0,0 +1,36 @@
+import re
+from typing import Optional
+
+from sqlalchemy import column, func, literal_column, table
+
+from database.models import SEARCH_INDEX_COLUMNS, SEARCH_INDEX_TABLE
+
+SEARCH_WEIGHTS = {
+    "title": 10.0,
+    "description": 1.0,
+    "venue": 4.0,
+    "tour_name": 5.0,
+    "channel_title": 2.0,
+}
+
+MAX_QUERY_TERMS = 8
+
+TERM_PATTERN = re.compile(r"[^\W_]+", re.UNICODE)
+
+videos_fts = table(SEARCH_INDEX_TABLE, column("rowid"), column(SEARCH_INDEX_TABLE))
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """Turn free user text into an FTS5 expression: every term must match as a prefix."""
+    terms = TERM_PATTERN.findall(query.lower())[:MAX_QUERY_TERMS]
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def match_clause(expression: str):
+    return videos_fts.c[SEARCH_INDEX_TABLE].match(expression)
+
+
+def rank_expression():
+    return func.bm25(literal_column(SEARCH_INDEX_TABLE), *(SEARCH_WEIGHTS[name] for name in SEARCH_INDEX_COLUMNS))
@@ -0,0 +1,58 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from bot.config import SINGLE_FLIGHT_TIMEOUT
+
+
+class SingleFlight:
+    """Collapses concurrent identical loads into one in-flight task.
+
+    The first caller for a key starts the load; callers arriving while it runs
+    await the same task and get the same result or exception. A follower waits
+    at most ``timeout`` seconds: after that the stuck flight is forgotten and the
+    follower loads on its own, so one slow query cannot hold a key hostage.
+    """
+
+    def __init__(self, timeout: float = SINGLE_FLIGHT_TIMEOUT):
+        self.timeout = timeout
+        self._flights: Dict[str, asyncio.Task] = {}
+        self.started = 0
+        self.joined = 0
+        self.timeouts = 0
+
+    async def do(self, key: str, loader: Callable[[], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        task = self._flights.get(key)
+        if task is None:
+            task = asyncio.ensure_future(loader())
+            self._flights[key] = task
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+            self.started += 1
+            return await asyncio.shield(task)
+
+        self.joined += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout if timeout is not None else self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            self._forget(key, task)
+            return await loader()
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        if task.done() and not task.cancelled():
+            # Mark the exception as retrieved when every waiter has gone away.
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {"in_flight": len(self._flights), "started": self.started, "joined": self.joined, "timeouts": self.timeouts}
+
+
+_flights: Optional[SingleFlight] = None
+
+
+def get_single_flight() -> SingleFlight:
+    global _flights
+    if _flights is None:
+        _flights = SingleFlight()
+    return _flights
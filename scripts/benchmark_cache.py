@@ -0,0 +1,81 @@
+"""Compare the legacy JSON cache format with the codec envelope.
+
+Measures the payload size stored in Redis and encode/decode time for a page of
+videos, without needing a running Redis:
+
+    python -m scripts.benchmark_cache --videos 10 --rounds 2000
+"""
+import argparse
+import json
+import random
+import timeit
+from datetime import date, datetime, timedelta
+
+from database.cache import Envelope, available_codecs, available_compressors
+from database.read_model import CARD_FIELDS, VideoCard, encode_page
+from database.pagination import VideoPage
+
+WORDS = "metallica live concert full show moscow seattle tour remastered pro shot audience hd".split()
+
+
+def make_video(i: int) -> dict:
+    event_date = date(1983, 1, 1) + timedelta(days=random.randint(0, 15000))
+    return {
+        "id": i,
+        "youtube_id": f"{i:011d}",
+        "title": " ".join(random.choices(WORDS, k=8)).title(),
+        "description": " ".join(random.choices(WORDS, k=250)),
+        "url": f"https://www.youtube.com/watch?v={i:011d}",
+        "thumbnail_url": f"https://i.ytimg.com/vi/{i:011d}/hqdefault.jpg",
+        "duration_seconds": random.randint(1200, 9000),
+        "published_at": (datetime(2010, 1, 1) + timedelta(days=i)).isoformat(),
+        "view_count": random.randint(1000, 5000000),
+        "content_type": random.choice(["concert", "interview"]),
+        "quality_score": random.randint(0, 100),
+        "is_official": random.random() < 0.2,
+        "is_complete": True,
+        "tour_name": random.choice(["M72 World Tour", "WorldWired Tour", "Wherever We May Roam Tour"]),
+        "venue": random.choice(["Tushino Airfield", "Seattle Center Coliseum", None]),
+        "date_event": event_date.isoformat(),
+        "event_date": event_date.isoformat(),
+        "event_year": event_date.year,
+        "quality_tags": "HD • OFFICIAL",
+        "channel_title": "Metallica",
+    }
+
+
+def measure(name: str, dumps, loads, value, rounds: int):
+    payload = dumps(value)
+    encode = timeit.timeit(lambda: dumps(value), number=rounds) / rounds * 1e6
+    decode = timeit.timeit(lambda: loads(payload), number=rounds) / rounds * 1e6
+    print(f"{name:<28} {len(payload):>9,} B {encode:>10.1f} us {decode:>10.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--videos", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    random.seed(42)
+    videos = [make_video(i) for i in range(args.videos)]
+    cards = [VideoCard(**{name: video[name] for name in CARD_FIELDS}) for video in videos]
+    page = encode_page(VideoPage(cards, 1000))
+
+    print(f"{'format':<28} {'size':>11} {'encode':>13} {'decode':>13}")
+    measure("json text, full records", lambda v: json.dumps(v), json.loads, videos, args.rounds)
+    measure("json text, card rows", lambda v: json.dumps(v), json.loads, page, args.rounds)
+    for codec in available_codecs():
+        envelope = Envelope(codec=codec, compression="none")
+        measure(f"{codec}, card rows", envelope.dumps, envelope.loads, page, args.rounds)
+        for compression in available_compressors():
+            envelope = Envelope(codec=codec, compression=compression, threshold=0)
+            measure(f"{codec}+{compression}, card rows", envelope.dumps, envelope.loads, page, args.rounds)
+
+    missing = {"msgpack", "zstd", "lz4"} - set(available_codecs()) - set(available_compressors())
+    if missing:
+        print(f"\nnot installed: {', '.join(sorted(missing))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,7 @@ import logging
 
 from dotenv import load_dotenv
 
-from bot.config import YOUTUBE_API_KEY
+from services.youtube.keys import get_key_pool
 from services.youtube.search import YouTubeCrawler
 
 
@@ -14,11 +14,14 @@ logger = logging.getLogger(__name__)
 async def main() -> None:
     load_dotenv()
 
-    if not YOUTUBE_API_KEY:
-        raise RuntimeError("YOUTUBE_API_KEY is not set. Update .env file.")
+    if not len(get_key_pool()):
+        raise RuntimeError("YOUTUBE_API_KEY or YOUTUBE_API_KEYS is not set. Update .env file.")
 
     crawler = YouTubeCrawler()
-    added = await crawler.sync_to_database()
+    try:
+        added = await crawler.sync_to_database()
+    finally:
+        await crawler.close()
     logger.info("Refresh completed. Added %s videos.", added)
 
 
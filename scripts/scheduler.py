@@ -2,46 +2,49 @@ import asyncio
 import json
 from datetime import datetime, timedelta
 from pathlib import Path
-from database.models import AsyncSessionLocal, init_db
+from database.models import AsyncReadSessionLocal, init_db
 from database.repository import VideoRepository, SyncStatusRepository
-from services.youtube.search import YouTubeCrawler
+from services.youtube.jobs import SYNC_TYPES, get_sync_manager
+from services.youtube.planner import (
+    CRAWL_MODE_FULL, CRAWL_MODE_INCREMENTAL, CRAWL_MODE_ARCHIVE, CRAWL_MODE_UPLOADS,
+    SEARCH_PAGE_COST, DETAILS_PAGE_COST, PLAYLIST_PAGE_COST
+)
+from services.youtube.keys import get_key_pool
 from services.classifier.content import ContentClassifier
 from services.quality.scorer import QualityScorer
 from utils.tour_detector import TourDetector
-from bot.config import SYNC_INTERVAL_HOURS
+from bot.config import SYNC_INTERVAL_HOURS, FULL_SYNC_INTERVAL_DAYS, UPLOADS_SYNC_INTERVAL_MINUTES
 from loguru import logger
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 
 class Scheduler:
     def __init__(self):
         self.scheduler = AsyncIOScheduler()
-        self.crawler = YouTubeCrawler()
+        self.jobs = get_sync_manager()
     
-    async def sync_videos(self):
-        logger.info("Starting scheduled YouTube sync...")
+    async def sync_videos(self, mode: str = CRAWL_MODE_FULL):
+        sync_type = SYNC_TYPES[mode]
+        logger.info(f"Starting scheduled YouTube sync ({sync_type})...")
         
-        try:
-            videos_found = await self.crawler.sync_to_database()
-            
-            async with AsyncSessionLocal() as session:
-                repo = SyncStatusRepository(session)
-                await repo.update_status(videos_added=videos_found, status="completed")
-            
-            logger.info(f"Sync completed. Found {videos_found} new videos.")
-            return videos_found
-        
-        except Exception as e:
-            logger.error(f"Sync failed: {e}")
-            async with AsyncSessionLocal() as session:
-                repo = SyncStatusRepository(session)
-                await repo.update_status(videos_added=0, status="failed", error=str(e))
+        # Attaches to a sync that is already running (e.g. one started by /refresh).
+        job = await self.jobs.run(mode=mode)
+        if job.error:
+            logger.error(f"Sync failed: {job.error}")
             return 0
+        
+        if job.partial:
+            logger.warning(f"Sync stopped early: {job.partial}")
+        logger.info(f"Sync completed. Found {job.videos_added} new videos.")
+        return job.videos_added
     
     async def check_and_sync(self):
-        async with AsyncSessionLocal() as session:
+        async with AsyncReadSessionLocal() as session:
             repo = SyncStatusRepository(session)
-            last_sync = await repo.get_last_sync()
+            # The hourly uploads crawl does not count as the daily search sync.
+            last_sync = await repo.get_last_sync(exclude_types=[SYNC_TYPES[CRAWL_MODE_UPLOADS]])
+            last_full_sync = await repo.get_last_sync(sync_type=SYNC_TYPES[CRAWL_MODE_FULL])
         
         if last_sync:
             next_sync = last_sync.last_sync + timedelta(hours=SYNC_INTERVAL_HOURS)
@@ -49,7 +52,33 @@ class Scheduler:
                 logger.info(f"Skipping sync. Next sync at {next_sync}")
                 return
         
-        await self.sync_videos()
+        full_due = (
+            last_full_sync is None
+            or datetime.utcnow() >= last_full_sync.last_sync + timedelta(days=FULL_SYNC_INTERVAL_DAYS)
+        )
+        remaining = await get_key_pool().load()
+        full_cost = self.jobs.get_crawler().estimate_cost(CRAWL_MODE_FULL)
+        
+        if full_due and remaining >= full_cost:
+            mode = CRAWL_MODE_FULL
+        elif remaining >= SEARCH_PAGE_COST + DETAILS_PAGE_COST:
+            if full_due:
+                logger.info(f"Full sync due but needs {full_cost} units, {remaining} left today; running incremental")
+            mode = CRAWL_MODE_INCREMENTAL
+        else:
+            logger.info(f"Skipping sync. YouTube quota left today: {remaining} units")
+            return
+        await self.sync_videos(mode=mode)
+    
+    async def sync_uploads(self):
+        if self.jobs.current is not None:
+            logger.info("Skipping uploads sync. Another YouTube sync is running")
+            return
+        remaining = await get_key_pool().load()
+        if remaining < PLAYLIST_PAGE_COST + DETAILS_PAGE_COST:
+            logger.info(f"Skipping uploads sync. YouTube quota left today: {remaining} units")
+            return
+        await self.sync_videos(mode=CRAWL_MODE_UPLOADS)
     
     def setup(self):
         self.scheduler.add_job(
@@ -59,6 +88,13 @@ class Scheduler:
             name='Daily YouTube video sync',
             replace_existing=True
         )
+        self.scheduler.add_job(
+            self.sync_uploads,
+            IntervalTrigger(minutes=UPLOADS_SYNC_INTERVAL_MINUTES),
+            id='official_uploads_sync',
+            name='Official channel uploads sync',
+            replace_existing=True
+        )
         self.scheduler.start()
         logger.info("Scheduler started")
 
@@ -74,6 +110,12 @@ if __name__ == "__main__":
     
     if len(sys.argv) > 1 and sys.argv[1] == "--init":
         asyncio.run(run_initial_sync())
+    elif len(sys.argv) > 1 and sys.argv[1] == "--incremental":
+        asyncio.run(Scheduler().sync_videos(mode=CRAWL_MODE_INCREMENTAL))
+    elif len(sys.argv) > 1 and sys.argv[1] == "--archive":
+        asyncio.run(Scheduler().sync_videos(mode=CRAWL_MODE_ARCHIVE))
+    elif len(sys.argv) > 1 and sys.argv[1] == "--uploads":
+        asyncio.run(Scheduler().sync_videos(mode=CRAWL_MODE_UPLOADS))
     else:
         init_db()
         scheduler = Scheduler()
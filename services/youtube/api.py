@@ -1,49 +1,96 @@
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-from bot.config import YOUTUBE_API_KEY
+from bot.config import CRAWL_RATE_LIMIT_RETRIES, CRAWL_BACKOFF_BASE, CRAWL_BACKOFF_MAX
 from bot.constants import EXCLUDE_KEYWORDS, METALLICA_REQUIRED_KEYWORDS
+from services.youtube.errors import (
+    YouTubeAPIError, YouTubeRateLimitError, YouTubeQuotaExceededError, YouTubeTransientError, PartialEnrichmentError
+)
+from services.youtube.keys import ApiKeyPool, get_key_pool
+from services.youtube.limiter import backoff_delay
+from services.youtube.quota import unit_cost
 from utils.date_parser import DateParser
 import asyncio
-from typing import Dict, List, Optional, Any
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Any, Tuple
 
 class YouTubeAPI:
-    def __init__(self):
-        self.api_key = YOUTUBE_API_KEY
-        self.youtube = None
+    def __init__(self, pool: Optional[ApiKeyPool] = None):
+        self.pool = pool or get_key_pool()
+    
+    @property
+    def has_keys(self) -> bool:
+        return len(self.pool) > 0
     
-    async def get_client(self):
-        if self.youtube is None:
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, self._init_client)
-        return self.youtube
+    async def close(self):
+        await self.pool.close()
     
-    def _init_client(self):
-        self.youtube = build("youtube", "v3", developerKey=self.api_key)
+    async def _execute(self, resource: str, **params) -> Dict[str, Any]:
+        attempt = 0
+        key = None
+        while True:
+            # Only a quota error moves the request to another key; transient errors retry on the same one,
+            # which may be a half-open probe that the pool would not hand out again.
+            if key is None:
+                key = self.pool.acquire(unit_cost(resource))
+                if key is None:
+                    raise YouTubeQuotaExceededError("Every YouTube API key is out of quota or cooling down", 403, "quotaExceeded")
+            
+            await key.rate_limiter.acquire()
+            # YouTube bills every request it receives, failed ones included.
+            key.ledger.charge(resource)
+            try:
+                response = await key.client.request(resource, params)
+            except YouTubeQuotaExceededError:
+                self.pool.cooldown(key)
+                print(f"YouTube API key {key.key_id} is out of quota, cooling down")
+                key = None
+                continue
+            except (YouTubeRateLimitError, YouTubeTransientError) as e:
+                if attempt >= CRAWL_RATE_LIMIT_RETRIES:
+                    raise
+                delay = backoff_delay(attempt, CRAWL_BACKOFF_BASE, CRAWL_BACKOFF_MAX)
+                attempt += 1
+                print(f"YouTube {resource} failed ({e}), retry {attempt} in {delay:.1f}s")
+                if isinstance(e, YouTubeRateLimitError):
+                    # Throttling applies to the whole key, so every caller using it slows down.
+                    key.rate_limiter.penalize(delay)
+                else:
+                    await asyncio.sleep(delay)
+                continue
+            except YouTubeAPIError:
+                # A 400/404 is the request's fault; the key answered, so a half-open probe goes back into rotation.
+                key.breaker.record_success()
+                raise
+            key.breaker.record_success()
+            return response
     
-    async def search_videos(
+    async def search_videos_page(
         self,
         query: str,
         max_results: int = 50,
-        order: str = "relevance"
-    ) -> List[Dict[str, Any]]:
-        if not self.api_key:
-            return []
-
-        await self.get_client()
+        order: str = "relevance",
+        published_after: Optional[datetime] = None,
+        published_before: Optional[datetime] = None,
+        page_token: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        if not self.has_keys:
+            return [], None
+        
+        params = {
+            "part": "snippet",
+            "q": query,
+            "type": "video",
+            "maxResults": max_results,
+            "order": order,
+            "videoDuration": "long"
+        }
+        if published_after:
+            params["publishedAfter"] = self._format_rfc3339(published_after)
+        if published_before:
+            params["publishedBefore"] = self._format_rfc3339(published_before)
+        if page_token:
+            params["pageToken"] = page_token
         
         try:
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                lambda: self.youtube.search().list(
-                    part="snippet",
-                    q=query,
-                    type="video",
-                    maxResults=max_results,
-                    order=order,
-                    videoDuration="long"
-                ).execute()
-            )
+            response = await self._execute("search", **params)
             
             videos = []
             for item in response.get("items", []):
@@ -60,29 +107,30 @@ class YouTubeAPI:
                 }
                 videos.append(video_data)
             
-            return videos
+            return videos, response.get("nextPageToken")
         
-        except HttpError as e:
-            print(f"YouTube API Error: {e}")
-            return []
+        except YouTubeAPIError:
+            raise
         except Exception as e:
             print(f"Search error: {e}")
-            return []
+            return [], None
+    
+    @staticmethod
+    def _format_rfc3339(value: datetime) -> str:
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.strftime("%Y-%m-%dT%H:%M:%SZ")
     
     async def get_video_details(self, video_ids: List[str]) -> List[Dict[str, Any]]:
-        if not video_ids or not self.api_key:
+        if not video_ids or not self.has_keys:
             return []
-
-        await self.get_client()
         
         try:
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                lambda: self.youtube.videos().list(
-                    part="snippet,contentDetails,statistics",
-                    id=",".join(video_ids)
-                ).execute()
+            response = await self._execute(
+                "videos",
+                part="snippet,contentDetails,statistics",
+                id=",".join(video_ids),
+                maxResults=len(video_ids)
             )
             
             videos = []
@@ -103,26 +151,105 @@ class YouTubeAPI:
             
             return videos
         
-        except HttpError as e:
-            print(f"YouTube API Error: {e}")
-            return []
+        except YouTubeAPIError:
+            raise
         except Exception as e:
             print(f"Details error: {e}")
             return []
 
+    async def get_uploads_playlist(self, channel: str) -> Optional[str]:
+        if not self.has_keys:
+            return None
+
+        # Channel names in the config may be handles or legacy usernames.
+        for lookup in ({"forHandle": f"@{channel.lstrip('@')}"}, {"forUsername": channel.lstrip('@')}):
+            response = await self._execute("channels", part="contentDetails", **lookup)
+            for item in response.get("items", []):
+                uploads = item.get("contentDetails", {}).get("relatedPlaylists", {}).get("uploads")
+                if uploads:
+                    return uploads
+        return None
+
+    async def playlist_items_page(
+        self,
+        playlist_id: str,
+        max_results: int = 50,
+        page_token: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        if not self.has_keys:
+            return [], None
+
+        params = {
+            "part": "snippet,contentDetails",
+            "playlistId": playlist_id,
+            "maxResults": max_results
+        }
+        if page_token:
+            params["pageToken"] = page_token
+
+        try:
+            response = await self._execute("playlistItems", **params)
+
+            videos = []
+            for item in response.get("items", []):
+                snippet = item["snippet"]
+                details = item.get("contentDetails", {})
+                # Private and deleted uploads stay in the playlist without a publish date.
+                if not details.get("videoPublishedAt"):
+                    continue
+                video_id = details.get("videoId") or snippet["resourceId"]["videoId"]
+                thumbnails = snippet.get("thumbnails", {})
+                video_data = {
+                    "youtube_id": video_id,
+                    "title": snippet["title"],
+                    "description": snippet.get("description", ""),
+                    "thumbnail_url": (thumbnails.get("high") or thumbnails.get("default") or {}).get("url", ""),
+                    "channel_title": snippet.get("videoOwnerChannelTitle") or snippet["channelTitle"],
+                    "channel_id": snippet.get("videoOwnerChannelId") or snippet["channelId"],
+                    "published_at": details["videoPublishedAt"],
+                    "url": f"https://www.youtube.com/watch?v={video_id}"
+                }
+                videos.append(video_data)
+
+            return videos, response.get("nextPageToken")
+
+        except YouTubeAPIError:
+            raise
+        except Exception as e:
+            print(f"Playlist error: {e}")
+            return [], None
+
 class YouTubeSearch:
+    DETAILS_BATCH_SIZE = 50
+
     def __init__(self):
         self.api = YouTubeAPI()
     
-    async def search_concerts(self, query: str) -> List[Dict[str, Any]]:
-        base = query if "metallica" in query.lower() else f"Metallica {query}"
-        search_query = f"{base} concert live full show"
-        return await self.api.search_videos(search_query)
+    async def close(self):
+        await self.api.close()
     
-    async def search_interviews(self, query: str) -> List[Dict[str, Any]]:
+    def build_search_text(self, query: str, content_type: str) -> str:
         base = query if "metallica" in query.lower() else f"Metallica {query}"
-        search_query = f"{base} interview full"
-        return await self.api.search_videos(search_query)
+        if content_type == "concert":
+            return f"{base} concert live full show"
+        return f"{base} interview full"
+    
+    async def search_page(
+        self,
+        query: str,
+        content_type: str,
+        order: str = "relevance",
+        published_after: Optional[datetime] = None,
+        published_before: Optional[datetime] = None,
+        page_token: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        return await self.api.search_videos_page(
+            self.build_search_text(query, content_type),
+            order=order,
+            published_after=published_after,
+            published_before=published_before,
+            page_token=page_token
+        )
     
     def is_metallica_content(self, title: str, description: str, channel_title: str) -> bool:
         text = f"{title} {description} {channel_title}".lower()
@@ -140,25 +267,45 @@ class YouTubeSearch:
 
         return False
     
-    async def enrich_video_data(self, video_data: Dict[str, Any]) -> Dict[str, Any]:
-        video_ids = [video_data['youtube_id']]
-        details = await self.api.get_video_details(video_ids)
-        
-        if details:
-            detail = details[0]
-            published_raw = detail.get('published_at') or video_data.get('published_at') or ""
-            video_data.update({
-                'duration': detail.get('duration'),
-                'view_count': detail.get('view_count'),
-                'duration_seconds': self._parse_duration(detail.get('duration', '')),
-                'published_at': DateParser.parse_youtube_datetime(published_raw)
-            })
-        else:
-            published_raw = video_data.get('published_at') or ""
-            if published_raw:
-                video_data['published_at'] = DateParser.parse_youtube_datetime(published_raw)
-
-        return video_data
+    async def enrich_videos(self, videos: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        video_ids = list(dict.fromkeys(video['youtube_id'] for video in videos))
+        details_by_id: Dict[str, Dict[str, Any]] = {}
+
+        error: Optional[YouTubeAPIError] = None
+
+        for start in range(0, len(video_ids), self.DETAILS_BATCH_SIZE):
+            chunk = video_ids[start:start + self.DETAILS_BATCH_SIZE]
+            try:
+                details = await self.api.get_video_details(chunk)
+            except YouTubeAPIError as e:
+                error = e
+                break
+            for detail in details:
+                details_by_id[detail['youtube_id']] = detail
+
+        for video_data in videos:
+            detail = details_by_id.get(video_data['youtube_id'])
+            if detail:
+                published_raw = detail.get('published_at') or video_data.get('published_at') or ""
+                video_data.update({
+                    'duration': detail.get('duration'),
+                    'view_count': detail.get('view_count'),
+                    'duration_seconds': self._parse_duration(detail.get('duration', '')),
+                    'published_at': DateParser.parse_youtube_datetime(published_raw)
+                })
+            else:
+                published_raw = video_data.get('published_at') or ""
+                if isinstance(published_raw, str) and published_raw:
+                    video_data['published_at'] = DateParser.parse_youtube_datetime(published_raw)
+
+        if error is not None:
+            fetched = set(video_ids[:start])
+            raise PartialEnrichmentError(
+                [video for video in videos if video['youtube_id'] in fetched],
+                [video for video in videos if video['youtube_id'] not in fetched],
+                error
+            )
+        return videos
     
     def _parse_duration(self, duration: str) -> int:
         import re
@@ -0,0 +1,63 @@
+import asyncio
+import json
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+from bot.config import YOUTUBE_API_TIMEOUT, YOUTUBE_HTTP_POOL_SIZE
+from services.youtube.errors import YouTubeAPIError, YouTubeTransientError, classify_error
+
+API_BASE_URL = "https://www.googleapis.com/youtube/v3/"
+# Google only serves gzip to clients whose user agent says they accept it.
+USER_AGENT = "metallica-archive-bot (gzip)"
+
+
+class YouTubeClient:
+    """Async client for the YouTube Data API v3 resources the crawler uses.
+
+    One aiohttp session (keep-alive connection pool, gzip) is shared by every
+    request, so calls run on the event loop instead of a thread pool and no
+    discovery document is fetched.
+    """
+
+    def __init__(self, api_key: str, pool_size: int = YOUTUBE_HTTP_POOL_SIZE, timeout: float = YOUTUBE_API_TIMEOUT):
+        self.api_key = api_key
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={"Accept-Encoding": "gzip", "User-Agent": USER_AGENT},
+                raise_for_status=False
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def request(self, resource: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        query = {name: str(value) for name, value in params.items() if value is not None}
+        query["key"] = self.api_key
+        try:
+            async with self.session.get(API_BASE_URL + resource, params=query) as response:
+                status = response.status
+                body = await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise YouTubeTransientError(f"{resource} request failed: {e!r}") from e
+
+        try:
+            payload = json.loads(body) if body else {}
+        except ValueError:
+            payload = None
+        if status >= 400:
+            raise classify_error(status, payload or {})
+        if not isinstance(payload, dict):
+            raise YouTubeAPIError(f"{resource} returned a non-JSON response", status)
+        return payload
@@ -0,0 +1,57 @@
+from typing import Any, Dict, List
+
+
+RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded"}
+QUOTA_REASONS = {"quotaExceeded", "dailyLimitExceeded"}
+
+
+class YouTubeAPIError(Exception):
+    def __init__(self, message: str, status: int = 0, reason: str = ""):
+        super().__init__(message)
+        self.status = status
+        self.reason = reason
+
+
+class YouTubeRateLimitError(YouTubeAPIError):
+    pass
+
+
+class YouTubeQuotaExceededError(YouTubeAPIError):
+    pass
+
+
+class YouTubeTransientError(YouTubeAPIError):
+    """A 5xx answer or a network failure; worth retrying."""
+
+
+class PartialEnrichmentError(Exception):
+    def __init__(self, videos: List[Dict[str, Any]], pending: List[Dict[str, Any]], error: YouTubeAPIError):
+        super().__init__(f"details stopped with {len(pending)} videos left: {error}")
+        self.videos = videos
+        self.pending = pending
+        self.error = error
+
+
+def get_error_reason(payload: Dict[str, Any]) -> str:
+    error = payload.get("error") if isinstance(payload, dict) else None
+    if not isinstance(error, dict):
+        return ""
+    for detail in error.get("errors") or []:
+        if isinstance(detail, dict) and detail.get("reason"):
+            return detail["reason"]
+    return ""
+
+
+def classify_error(status: int, payload: Dict[str, Any]) -> YouTubeAPIError:
+    reason = get_error_reason(payload)
+    error = payload.get("error") if isinstance(payload, dict) else None
+    message = error.get("message") if isinstance(error, dict) and error.get("message") else f"HTTP {status}"
+    message = f"<HttpError {status}: {message}>"
+
+    if reason in QUOTA_REASONS:
+        return YouTubeQuotaExceededError(message, status, reason)
+    if status == 429 or reason in RATE_LIMIT_REASONS:
+        return YouTubeRateLimitError(message, status, reason)
+    if status >= 500:
+        return YouTubeTransientError(message, status, reason)
+    return YouTubeAPIError(message, status, reason)
@@ -0,0 +1,152 @@
+import asyncio
+import time
+from dataclasses import astuple
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from bot.config import SYNC_PROGRESS_INTERVAL
+from database.models import AsyncSessionLocal
+from database.repository import SyncStatusRepository
+from services.youtube.planner import CRAWL_MODE_FULL, CRAWL_MODE_INCREMENTAL, CRAWL_MODE_ARCHIVE, CRAWL_MODE_UPLOADS
+from services.youtube.search import YouTubeCrawler, SyncProgress
+
+SYNC_TYPES = {
+    CRAWL_MODE_FULL: "youtube",
+    CRAWL_MODE_INCREMENTAL: "youtube_incremental",
+    CRAWL_MODE_ARCHIVE: "youtube_archive",
+    CRAWL_MODE_UPLOADS: "youtube_uploads",
+}
+
+Subscriber = Callable[["SyncJob"], Awaitable[None]]
+
+
+class SyncJob:
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.sync_type = SYNC_TYPES[mode]
+        self.progress = SyncProgress()
+        self.subscribers: List[Subscriber] = []
+        self.started = time.monotonic()
+        self.task: Optional[asyncio.Task] = None
+        self.videos_added = 0
+        self.error: Optional[Exception] = None
+        self.partial: Optional[str] = None
+        self.done = False
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    async def wait(self) -> int:
+        await asyncio.shield(self.task)
+        return self.videos_added
+
+
+class SyncJobManager:
+    """Runs at most one YouTube sync at a time.
+
+    A request for the mode that is already running attaches to that job; a
+    request for another mode is queued (one job per mode) and starts when the
+    running job ends. Subscribers are called every ``progress_interval``
+    seconds while the progress changes, and once more when the job finishes.
+    """
+
+    def __init__(self, progress_interval: float = SYNC_PROGRESS_INTERVAL):
+        self.progress_interval = progress_interval
+        self.current: Optional[SyncJob] = None
+        self.queued: Dict[str, SyncJob] = {}
+        self.crawler: Optional[YouTubeCrawler] = None
+
+    def get_crawler(self) -> YouTubeCrawler:
+        if self.crawler is None:
+            self.crawler = YouTubeCrawler()
+        return self.crawler
+
+    def find(self, mode: str) -> Optional[SyncJob]:
+        if self.current is not None and self.current.mode == mode:
+            return self.current
+        return self.queued.get(mode)
+
+    def start(self, mode: str = CRAWL_MODE_FULL, subscriber: Optional[Subscriber] = None) -> Tuple[SyncJob, bool]:
+        job = self.find(mode)
+        started = job is None
+        if started:
+            job = SyncJob(mode)
+            if self.current is None:
+                self.current = job
+            else:
+                job.progress.stage = "queued"
+                self.queued[mode] = job
+            job.task = asyncio.create_task(self._run_when_free(job))
+        if subscriber is not None:
+            job.subscribers.append(subscriber)
+        return job, started
+
+    async def run(self, mode: str = CRAWL_MODE_FULL) -> SyncJob:
+        job, _ = self.start(mode)
+        await job.wait()
+        return job
+
+    async def _run_when_free(self, job: SyncJob):
+        while self.current is not None and self.current is not job:
+            await asyncio.wait({self.current.task})
+        self.current = job
+        self.queued.pop(job.mode, None)
+        await self._run(job)
+
+    async def _run(self, job: SyncJob):
+        job.started = time.monotonic()
+        job.progress.stage = "search"
+        reporter = asyncio.create_task(self._report(job))
+        status, error = "completed", None
+        try:
+            crawler = self.get_crawler()
+            crawler.progress = job.progress
+            job.videos_added = await crawler.sync_to_database(mode=job.mode)
+            job.partial = crawler.interrupted
+            if job.partial:
+                # Saved rows are kept; watermarks of unfinished windows did not move, so the next run fetches the rest.
+                status, error = "partial", job.partial
+        except Exception as exc:
+            job.error = exc
+            status, error = "failed", str(exc)
+        finally:
+            reporter.cancel()
+            job.progress.stage = "done"
+            job.done = True
+            if self.current is job:
+                self.current = None
+
+        try:
+            async with AsyncSessionLocal() as session:
+                await SyncStatusRepository(session).update_status(
+                    videos_added=job.videos_added, status=status, error=error, sync_type=job.sync_type
+                )
+        except Exception as exc:
+            print(f"Failed to record sync status: {exc}")
+        await self._notify(job)
+
+    async def _report(self, job: SyncJob):
+        last = None
+        while True:
+            await asyncio.sleep(self.progress_interval)
+            current = astuple(job.progress)
+            if current != last:
+                last = current
+                await self._notify(job)
+
+    async def _notify(self, job: SyncJob):
+        for subscriber in list(job.subscribers):
+            try:
+                await subscriber(job)
+            except Exception as exc:
+                print(f"Sync progress subscriber failed: {exc}")
+
+
+_sync_manager: Optional[SyncJobManager] = None
+
+
+def get_sync_manager() -> SyncJobManager:
+    global _sync_manager
+    if _sync_manager is None:
+        _sync_manager = SyncJobManager()
+    return _sync_manager
@@ -0,0 +1,147 @@
+import asyncio
+import hashlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytz
+
+from bot.config import (
+    YOUTUBE_API_KEY, YOUTUBE_API_KEYS, YOUTUBE_DAILY_QUOTA, CRAWL_REQUESTS_PER_SECOND, CRAWL_CONCURRENCY, CRAWL_QUOTA_COOLDOWN
+)
+from utils.circuit_breaker import CircuitBreaker
+from services.youtube.client import YouTubeClient
+from services.youtube.limiter import TokenBucket
+from services.youtube.quota import QuotaLedger, next_reset
+
+
+def parse_api_keys(raw: str = YOUTUBE_API_KEYS, fallback: str = YOUTUBE_API_KEY) -> List[Tuple[str, int]]:
+    """Read ``key[:weight]`` entries separated by commas; a single YOUTUBE_API_KEY is the fallback."""
+    keys: Dict[str, int] = {}
+    for position, entry in enumerate(raw.split(","), start=1):
+        entry = entry.strip()
+        if not entry:
+            continue
+        key, _, weight = entry.partition(":")
+        try:
+            keys[key.strip()] = int(weight) if weight else 1
+        except ValueError:
+            raise ValueError(f"YOUTUBE_API_KEYS entry {position} has a non-integer weight") from None
+        if keys[key.strip()] < 1:
+            raise ValueError(f"YOUTUBE_API_KEYS entry {position} needs a weight of at least 1")
+    if not keys and fallback:
+        keys[fallback] = 1
+    return list(keys.items())
+
+
+def key_id_for(key: str) -> str:
+    """Stable, non-secret name for a key in logs, stats and the quota table."""
+    return hashlib.sha256(key.encode()).hexdigest()[:12]
+
+
+class ApiKey:
+    def __init__(self, key: str, weight: int = 1, daily_limit: int = YOUTUBE_DAILY_QUOTA):
+        self.key_id = key_id_for(key)
+        self.weight = weight
+        self.client = YouTubeClient(key)
+        self.ledger = QuotaLedger(daily_limit, key_id=self.key_id)
+        self.rate_limiter = TokenBucket(CRAWL_REQUESTS_PER_SECOND, CRAWL_CONCURRENCY)
+        # A quotaExceeded response puts the key in cooldown until the daily reset; after it a single probe request decides.
+        self.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=CRAWL_QUOTA_COOLDOWN)
+        self.current_weight = 0
+
+    @property
+    def cooling_down(self) -> bool:
+        return self.breaker.state == CircuitBreaker.OPEN
+
+    def available(self, units: int) -> bool:
+        return not self.cooling_down and self.ledger.can_afford(units)
+
+
+class ApiKeyPool:
+    """API keys picked by smooth weighted round-robin, each with its own client, ledger and cooldown.
+
+    The pool also answers the ledger questions for all keys together
+    (remaining, used, can_afford), which is what crawl planning needs.
+    """
+
+    def __init__(self, keys: Optional[List[Tuple[str, int]]] = None, daily_limit: int = YOUTUBE_DAILY_QUOTA):
+        entries = parse_api_keys() if keys is None else keys
+        self.keys = [ApiKey(key, weight, daily_limit) for key, weight in entries]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def acquire(self, units: int) -> Optional[ApiKey]:
+        candidates = [key for key in self.keys if key.available(units)]
+        if not candidates:
+            return None
+        total = 0
+        chosen = None
+        for key in candidates:
+            key.current_weight += key.weight
+            total += key.weight
+            if chosen is None or key.current_weight > chosen.current_weight:
+                chosen = key
+        chosen.current_weight -= total
+        if chosen.breaker.state == CircuitBreaker.HALF_OPEN:
+            chosen.breaker.allow()
+        return chosen
+
+    def cooldown(self, key: ApiKey):
+        # Daily quota only comes back at the Pacific midnight reset; probing earlier is billed for nothing.
+        key.breaker.trip((next_reset() - datetime.now(pytz.utc)).total_seconds())
+
+    @property
+    def daily_limit(self) -> int:
+        return sum(key.ledger.daily_limit for key in self.keys)
+
+    @property
+    def used(self) -> int:
+        return sum(key.ledger.used for key in self.keys)
+
+    @property
+    def remaining(self) -> int:
+        return sum(key.ledger.remaining for key in self.keys if not key.cooling_down)
+
+    def can_afford(self, units: int) -> bool:
+        return any(key.available(units) for key in self.keys)
+
+    async def load(self) -> int:
+        for key in self.keys:
+            await key.ledger.load()
+        return self.remaining
+
+    async def flush(self):
+        for key in self.keys:
+            await key.ledger.flush()
+
+    async def close(self):
+        await asyncio.gather(*(key.client.close() for key in self.keys))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "used": self.used,
+            "limit": self.daily_limit,
+            "remaining": self.remaining,
+            "reset_at": next_reset(),
+            "keys": [
+                {
+                    "key_id": key.key_id,
+                    "weight": key.weight,
+                    "remaining": key.ledger.remaining,
+                    "limit": key.ledger.daily_limit,
+                    "cooling_down": key.cooling_down,
+                }
+                for key in self.keys
+            ],
+        }
+
+
+_key_pool: Optional[ApiKeyPool] = None
+
+
+def get_key_pool() -> ApiKeyPool:
+    global _key_pool
+    if _key_pool is None:
+        _key_pool = ApiKeyPool()
+    return _key_pool
@@ -0,0 +1,51 @@
+import asyncio
+import random
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        if now < self._paused_until:
+            self._updated_at = now
+            return
+        elapsed = now - max(self._updated_at, self._paused_until)
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated_at = now
+
+    async def acquire(self, tokens: float = 1.0):
+        if self.rate <= 0:
+            return
+
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._paused_until and self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    wait = (tokens - self._tokens) / self.rate
+                await asyncio.sleep(wait)
+
+    def penalize(self, seconds: float):
+        now = time.monotonic()
+        self._refill(now)
+        self._tokens = 0.0
+        self._paused_until = max(self._paused_until, now + seconds)
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with equal jitter: half the step is fixed, half is random."""
+    step = min(cap, base * 2 ** attempt)
+    return step / 2 + random.uniform(0, step / 2)
@@ -0,0 +1,184 @@
+import json
+from dataclasses import dataclass, replace
+from datetime import datetime, date, timedelta
+from itertools import zip_longest
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from bot.config import CRAWL_ARCHIVE_START_YEAR, CRAWL_MAX_PAGES_PER_WINDOW
+from bot.constants import CONTENT_TYPE_CONCERT, CONTENT_TYPE_INTERVIEW
+
+CRAWL_MODE_FULL = "full"
+CRAWL_MODE_INCREMENTAL = "incremental"
+CRAWL_MODE_ARCHIVE = "archive"
+CRAWL_MODE_UPLOADS = "uploads"
+
+SLICE_BY_YEAR = "year"
+SLICE_BY_TOUR = "tour"
+
+SEARCH_PAGE_COST = 100
+DETAILS_PAGE_COST = 1
+PLAYLIST_PAGE_COST = 1
+CHANNEL_LOOKUP_COST = 1
+
+YOUTUBE_LAUNCH_DATE = date(2005, 4, 23)
+
+
+@dataclass(frozen=True)
+class CrawlWindow:
+    query: str
+    content_type: str
+    search_text: str = ""
+    published_after: Optional[datetime] = None
+    published_before: Optional[datetime] = None
+    order: str = "relevance"
+    max_pages: int = 1
+
+    @property
+    def text(self) -> str:
+        return self.search_text or self.query
+
+    @property
+    def label(self) -> str:
+        if self.published_after or self.published_before:
+            start = self.published_after.date().isoformat() if self.published_after else "..."
+            end = self.published_before.date().isoformat() if self.published_before else "..."
+            return f"{self.text} [{start} - {end}]"
+        return self.text
+
+
+class CrawlPlanner:
+    def __init__(self, tours: Optional[List[Dict]] = None):
+        self.tours = tours if tours is not None else self._load_tours()
+
+    def _load_tours(self) -> List[Dict]:
+        tours_file = Path(__file__).parent.parent.parent / "data" / "tours.json"
+        if tours_file.exists():
+            with open(tours_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get("tours", [])
+        return []
+
+    @staticmethod
+    def content_type_for(query: str) -> str:
+        lowered = query.lower()
+        if "concert" in lowered or "live" in lowered:
+            return CONTENT_TYPE_CONCERT
+        return CONTENT_TYPE_INTERVIEW
+
+    def plan_full(self, queries: List[str]) -> List[CrawlWindow]:
+        return [CrawlWindow(query, self.content_type_for(query)) for query in queries]
+
+    def plan_incremental(
+        self,
+        queries: List[str],
+        watermarks: Dict[str, datetime],
+        resume_points: Optional[Dict[str, Tuple[datetime, Optional[datetime]]]] = None
+    ) -> List[CrawlWindow]:
+        resume_points = resume_points or {}
+        windows = []
+        for query in queries:
+            watermark = watermarks.get(query)
+            # Queries without a watermark are paged by date too; only such windows can set one.
+            # A query with a resume point first finishes the gap an earlier run left behind.
+            windows.append(CrawlWindow(
+                query,
+                self.content_type_for(query),
+                published_after=watermark + timedelta(seconds=1) if watermark else None,
+                published_before=resume_points[query][0] if query in resume_points else None,
+                order="date",
+                max_pages=CRAWL_MAX_PAGES_PER_WINDOW
+            ))
+        return windows
+
+    def plan_archive(
+        self,
+        queries: List[str],
+        slicing: str = SLICE_BY_YEAR,
+        max_pages: int = CRAWL_MAX_PAGES_PER_WINDOW
+    ) -> List[CrawlWindow]:
+        if slicing == SLICE_BY_TOUR:
+            slices = self._tour_slices()
+        else:
+            slices = self._year_slices()
+
+        windows = []
+        for search_suffix, published_after, published_before in slices:
+            for query in queries:
+                windows.append(CrawlWindow(
+                    query,
+                    self.content_type_for(query),
+                    search_text=f"{query} {search_suffix}".strip(),
+                    published_after=published_after,
+                    published_before=published_before,
+                    max_pages=max_pages
+                ))
+        return windows
+
+    def _year_slices(self) -> List[tuple]:
+        current_year = datetime.utcnow().year
+        start_year = max(CRAWL_ARCHIVE_START_YEAR, YOUTUBE_LAUNCH_DATE.year)
+        slices = []
+        for year in range(current_year, start_year - 1, -1):
+            published_before = datetime(year + 1, 1, 1) if year < current_year else None
+            slices.append(("", datetime(year, 1, 1), published_before))
+        return slices
+
+    def _tour_slices(self) -> List[tuple]:
+        slices = []
+        for tour in sorted(self.tours, key=lambda t: t.get("start_date", ""), reverse=True):
+            try:
+                start = date.fromisoformat(tour["start_date"])
+                end = date.fromisoformat(tour["end_date"])
+            except (KeyError, ValueError):
+                continue
+
+            if end < YOUTUBE_LAUNCH_DATE:
+                slices.append((tour.get("album") or tour.get("name", ""), None, None))
+                continue
+
+            published_after = datetime.combine(max(start, YOUTUBE_LAUNCH_DATE), datetime.min.time())
+            published_before = datetime.combine(end + timedelta(days=1), datetime.min.time())
+            slices.append(("", published_after, published_before))
+        return slices
+
+    @staticmethod
+    def rotate(windows: List[CrawlWindow], crawled: Dict[str, datetime]) -> List[CrawlWindow]:
+        """Put windows never crawled first, then those crawled longest ago.
+
+        The archive plan is far larger than one day's budget, so ``fit_to_budget``
+        keeps the head of this order and successive runs work through the whole archive.
+        """
+        return sorted(windows, key=lambda window: crawled.get(window.label, datetime.min))
+
+    @staticmethod
+    def estimate_cost(windows: List[CrawlWindow]) -> int:
+        return sum(window.max_pages * (SEARCH_PAGE_COST + DETAILS_PAGE_COST) for window in windows)
+
+    @staticmethod
+    def fit_to_budget(windows: List[CrawlWindow], units: int) -> List[CrawlWindow]:
+        """Trim a plan so its worst-case cost fits in ``units``.
+
+        Pages are handed out breadth-first, alternating content types, so every
+        query gets its first page before any query gets a second one and a
+        short budget still covers both concerts and interviews. Windows that
+        get no page are dropped.
+        """
+        page_cost = SEARCH_PAGE_COST + DETAILS_PAGE_COST
+        by_type: Dict[str, List[int]] = {}
+        for i, window in enumerate(windows):
+            by_type.setdefault(window.content_type, []).append(i)
+        order = [i for group in zip_longest(*by_type.values()) for i in group if i is not None]
+
+        pages = [0] * len(windows)
+        remaining = units
+        granted = True
+        while granted and remaining >= page_cost:
+            granted = False
+            for i in order:
+                if remaining < page_cost:
+                    break
+                if pages[i] < max(windows[i].max_pages, 1):
+                    pages[i] += 1
+                    remaining -= page_cost
+                    granted = True
+        return [replace(window, max_pages=count) for window, count in zip(windows, pages) if count]
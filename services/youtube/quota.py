@@ -0,0 +1,109 @@
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Optional
+
+import pytz
+
+from bot.config import YOUTUBE_DAILY_QUOTA
+from database.models import AsyncSessionLocal, AsyncReadSessionLocal
+from database.repository import QuotaUsageRepository
+from services.youtube.planner import SEARCH_PAGE_COST, DETAILS_PAGE_COST, PLAYLIST_PAGE_COST, CHANNEL_LOOKUP_COST
+
+# YouTube resets the daily quota at midnight Pacific time.
+QUOTA_TIMEZONE = pytz.timezone("America/Los_Angeles")
+
+UNIT_COSTS = {
+    "search": SEARCH_PAGE_COST,
+    "videos": DETAILS_PAGE_COST,
+    "playlistItems": PLAYLIST_PAGE_COST,
+    "channels": CHANNEL_LOOKUP_COST,
+}
+
+
+def unit_cost(resource: str, calls: int = 1) -> int:
+    return UNIT_COSTS.get(resource, 1) * calls
+
+
+def quota_day(now: Optional[datetime] = None) -> date:
+    now = now or datetime.now(pytz.utc)
+    if now.tzinfo is None:
+        now = pytz.utc.localize(now)
+    return now.astimezone(QUOTA_TIMEZONE).date()
+
+
+def next_reset(now: Optional[datetime] = None) -> datetime:
+    midnight = datetime.combine(quota_day(now) + timedelta(days=1), time.min)
+    return QUOTA_TIMEZONE.localize(midnight).astimezone(pytz.utc)
+
+
+class QuotaLedger:
+    """Daily quota usage of one API key: charged per request, persisted per Pacific day.
+
+    Charges are counted in memory the moment a request is sent, so concurrent
+    windows see each other's spend, and written to ``quota_usage`` by ``flush``.
+    ``load`` re-reads the stored total for today and adds what is not flushed yet.
+    """
+
+    def __init__(self, daily_limit: int = YOUTUBE_DAILY_QUOTA, key_id: Optional[str] = None):
+        self.daily_limit = daily_limit
+        self.key_id = key_id
+        self.day = quota_day()
+        self.used = 0
+        self.calls = 0
+        self._pending: Dict[date, list] = {}
+
+    def _roll(self):
+        today = quota_day()
+        if today != self.day:
+            self.day = today
+            self.used = self._pending.get(today, [0, 0])[0]
+            self.calls = 0
+
+    @property
+    def remaining(self) -> int:
+        self._roll()
+        return max(self.daily_limit - self.used, 0)
+
+    def can_afford(self, units: int) -> bool:
+        return self.remaining >= units
+
+    def charge(self, resource: str, calls: int = 1) -> int:
+        self._roll()
+        units = unit_cost(resource, calls)
+        self.used += units
+        self.calls += calls
+        pending = self._pending.setdefault(self.day, [0, 0])
+        pending[0] += units
+        pending[1] += calls
+        return units
+
+    async def load(self) -> int:
+        self._roll()
+        async with AsyncReadSessionLocal() as session:
+            stored = await QuotaUsageRepository(session).get_usage(self.day, self.key_id)
+        self.used = stored + self._pending.get(self.day, [0, 0])[0]
+        return self.remaining
+
+    async def flush(self):
+        pending, self._pending = self._pending, {}
+        try:
+            async with AsyncSessionLocal() as session:
+                repo = QuotaUsageRepository(session)
+                for day, (units, calls) in pending.items():
+                    await repo.add_usage(day, units, calls, self.key_id)
+        except Exception:
+            for day, (units, calls) in pending.items():
+                current = self._pending.setdefault(day, [0, 0])
+                current[0] += units
+                current[1] += calls
+            raise
+
+    def snapshot(self) -> Dict[str, Any]:
+        remaining = self.remaining
+        return {
+            "day": self.day,
+            "used": self.used,
+            "limit": self.daily_limit,
+            "remaining": remaining,
+            "reset_at": next_reset(),
+        }
+
@@ -1,25 +1,38 @@
+from bot.config import CRAWL_CONCURRENCY, CRAWL_QUOTA_BUDGET, CRAWL_UPLOADS_MAX_PAGES, OFFICIAL_CHANNELS
 from bot.constants import SEARCH_QUERIES
 from services.youtube.api import YouTubeSearch
+from services.youtube.errors import YouTubeAPIError, YouTubeQuotaExceededError, YouTubeRateLimitError, PartialEnrichmentError
+from services.youtube.planner import (
+    CrawlPlanner, CrawlWindow, SEARCH_PAGE_COST, DETAILS_PAGE_COST, PLAYLIST_PAGE_COST, CHANNEL_LOOKUP_COST,
+    CRAWL_MODE_FULL, CRAWL_MODE_INCREMENTAL, CRAWL_MODE_ARCHIVE, CRAWL_MODE_UPLOADS, SLICE_BY_YEAR
+)
 from services.classifier.content import ContentClassifier
 from services.quality.scorer import QualityScorer
 from utils.tour_detector import TourDetector
 from utils.date_parser import DateParser
-from database.repository import VideoRepository
+from database.repository import VideoRepository, QueryWatermarkRepository, ArchiveProgressRepository
 from database.models import AsyncSessionLocal
+from database.read_model import get_catalog_watcher, video_tags
+from database.cache import invalidate_pages, sweep_stale_pages
 import asyncio
-import re
-from typing import List, Dict, Any
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Tuple, Set
 
-def parse_youtube_duration(duration: str) -> int:
-    if not duration:
-        return 0
-    match = re.match(r'PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?', duration)
-    if match:
-        hours = int(match.group(1) or 0)
-        minutes = int(match.group(2) or 0)
-        seconds = int(match.group(3) or 0)
-        return hours * 3600 + minutes * 60 + seconds
-    return 0
+@dataclass
+class SyncProgress:
+    stage: str = "search"
+    queries_total: int = 0
+    queries_done: int = 0
+    videos_found: int = 0
+    videos_added: int = 0
+
+class PartialWindowError(Exception):
+    def __init__(self, videos: List[Dict[str, Any]], error: Exception):
+        super().__init__(f"window stopped after {len(videos)} hits: {error}")
+        self.videos = videos
+        self.error = error
 
 class YouTubeCrawler:
     def __init__(self):
@@ -27,131 +40,434 @@ class YouTubeCrawler:
         self.classifier = ContentClassifier()
         self.scorer = QualityScorer()
         self.tour_detector = TourDetector()
+        self.planner = CrawlPlanner(self.tour_detector.tours)
+        self.concurrency = CRAWL_CONCURRENCY
+        self.ledger = self.search.api.pool
+        self.query_stats: List[Dict[str, Any]] = []
+        self.quota_exhausted = False
+        self.watermarks: Dict[str, datetime] = {}
+        self.seen_watermarks: Dict[str, datetime] = {}
+        # query -> (resume_before, resume_watermark), see QueryWatermark
+        self.resume_points: Dict[str, Tuple[datetime, Optional[datetime]]] = {}
+        self.seen_resume_points: Dict[str, Optional[Tuple[datetime, Optional[datetime]]]] = {}
+        self.truncated: Set[CrawlWindow] = set()
+        self.pending_queries: Set[str] = set()
+        self.crawled_windows: List[str] = []
+        self.known_ids: Set[str] = set()
+        self.known_skipped = 0
+        self.progress = SyncProgress()
+        self.interruptions: List[str] = []
+        # channel -> uploads playlist id (None if the channel was not found), resolved once per process
+        self.uploads_playlists: Dict[str, Optional[str]] = {}
     
-    async def crawl_all(self) -> List[Dict[str, Any]]:
-        all_videos = []
+    @property
+    def interrupted(self) -> Optional[str]:
+        """Why the last sync saved only part of what it planned, or None if it finished."""
+        return "; ".join(self.interruptions) or None
+    
+    async def close(self):
+        await self.search.close()
+    
+    @staticmethod
+    def all_queries() -> List[str]:
+        return SEARCH_QUERIES.get("concerts", []) + SEARCH_QUERIES.get("interviews", [])
+    
+    def estimate_cost(self, mode: str = CRAWL_MODE_FULL) -> int:
+        """Worst-case quota units for a crawl in ``mode`` before the budget trims it."""
+        if mode == CRAWL_MODE_UPLOADS:
+            lookups = sum(1 for channel in OFFICIAL_CHANNELS if channel not in self.uploads_playlists)
+            pages = len(OFFICIAL_CHANNELS) * CRAWL_UPLOADS_MAX_PAGES
+            return lookups * 2 * CHANNEL_LOOKUP_COST + pages * (PLAYLIST_PAGE_COST + DETAILS_PAGE_COST)
+        if mode == CRAWL_MODE_ARCHIVE:
+            windows = self.planner.plan_archive(self.all_queries())
+        elif mode == CRAWL_MODE_INCREMENTAL:
+            windows = self.planner.plan_incremental(self.all_queries(), self.watermarks, self.resume_points)
+        else:
+            windows = self.planner.plan_full(self.all_queries())
+        return CrawlPlanner.estimate_cost(windows)
+    
+    async def crawl_all(self, incremental: bool = False) -> List[Dict[str, Any]]:
+        queries = self.all_queries()
+        if incremental:
+            windows = self.planner.plan_incremental(queries, self.watermarks, self.resume_points)
+        else:
+            windows = self.planner.plan_full(queries)
+        return await self.crawl_windows(windows)
+    
+    async def crawl_archive(self, slicing: str = SLICE_BY_YEAR, budget: int = CRAWL_QUOTA_BUDGET) -> List[Dict[str, Any]]:
+        async with AsyncSessionLocal() as session:
+            crawled = await ArchiveProgressRepository(session).get_crawled()
+        windows = CrawlPlanner.rotate(self.planner.plan_archive(self.all_queries(), slicing=slicing), crawled)
+        videos = await self.crawl_windows(windows, budget=budget)
         
-        queries = SEARCH_QUERIES.get("concerts", []) + SEARCH_QUERIES.get("interviews", [])
+        # Windows count as done once their videos can be saved; the rest come first next time.
+        queries = {window.label: window.query for window in windows}
+        self.crawled_windows = [
+            stat["query"] for stat in self.query_stats
+            if stat["status"] == "ok" and queries.get(stat["query"]) not in self.pending_queries
+        ]
+        return videos
+    
+    @staticmethod
+    def uploads_query(channel: str) -> str:
+        return f"uploads:{channel}"
+    
+    async def crawl_uploads(self, max_pages: int = CRAWL_UPLOADS_MAX_PAGES) -> List[Dict[str, Any]]:
+        """Official channels' uploads via playlistItems.list, 1 unit per 50 videos instead of 100 per search page.
         
-        for query in queries:
-            print(f"Searching: {query}")
-            videos = await self.search.search_concerts(query) if "concert" in query.lower() or "live" in query.lower() else await self.search.search_interviews(query)
-            
-            for video in videos:
-                if self.search.should_exclude(video.get('title', ''), video.get('description', ''), video.get('channel_title', '')):
-                    continue
-                
-                enriched = await self.search.enrich_video_data(video)
-                
-                content_type = self.classifier.classify(enriched)
-                enriched['content_type'] = content_type
-                
-                quality_score = self.scorer.calculate_score(enriched)
-                enriched['quality_score'] = quality_score
-                
-                is_complete = self.scorer.is_complete(enriched, content_type)
-                enriched['is_complete'] = is_complete
-
-                if not is_complete:
-                    continue
-                
-                quality_tags = self.scorer.get_tags(enriched)
-                enriched['quality_tags'] = " • ".join(quality_tags) if quality_tags else ""
-                
-                tour_name = self.tour_detector.detect_tour(enriched.get('title', ''))
-                enriched['tour_name'] = tour_name
-
-                title_date = DateParser.extract_date_from_title(enriched.get('title', ''))
-                published_at = enriched.get('published_at')
-                if hasattr(published_at, "date"):
-                    published_date = published_at.date()
+        Uploads are listed newest first. A channel gets a watermark only once it has
+        been paged to the end (or down to its previous watermark), and later runs stop
+        at the first page reaching it.
+        """
+        candidates: Dict[str, Dict[str, Any]] = {}
+        self.known_skipped = 0
+        self.query_stats = []
+        self.seen_watermarks = {}
+        self.seen_resume_points = {}
+        self.progress.stage = "search"
+        self.progress.queries_total += len(OFFICIAL_CHANNELS)
+        
+        playlists: Dict[str, str] = {}
+        for channel in OFFICIAL_CHANNELS:
+            started = time.monotonic()
+            videos: List[Dict[str, Any]] = []
+            status = "ok"
+            try:
+                playlist_id = await self._resolve_uploads_playlist(channel)
+                if playlist_id is None:
+                    status = "not_found"
+                elif playlist_id in playlists.values():
+                    status = "duplicate"
                 else:
-                    published_date = DateParser.parse_youtube_date(str(published_at or ""))
-                enriched['date_event'] = title_date or published_date
-                
-                enriched['search_query'] = query
-                enriched['is_official'] = self.scorer.is_official_channel(enriched.get('channel_title', ''))
-                
-                all_videos.append(enriched)
+                    playlists[channel] = playlist_id
+                    videos = await self._fetch_uploads(channel, playlist_id, max_pages)
+            except PartialWindowError as e:
+                videos = e.videos
+                status = "partial"
+            except YouTubeQuotaExceededError:
+                status = "quota_exceeded"
+            except YouTubeAPIError as e:
+                status = "error"
+                print(f"YouTube API error for {channel} uploads: {e}")
             
-            await asyncio.sleep(1)
+            elapsed = time.monotonic() - started
+            self.progress.queries_done += 1
+            self.progress.videos_found += len(videos)
+            self.query_stats.append({
+                "query": self.uploads_query(channel),
+                "hits": len(videos),
+                "seconds": round(elapsed, 3),
+                "status": status
+            })
+            print(f"Uploads: {channel} - {len(videos)} videos in {elapsed:.2f}s ({status})")
+            self._collect_candidates(videos, self.uploads_query(channel), candidates)
         
-        return all_videos
+        failed = sum(1 for stat in self.query_stats if stat["status"] in ("partial", "quota_exceeded", "error"))
+        if failed:
+            self.interruptions.append(f"{failed} of {len(OFFICIAL_CHANNELS)} official channels not fully crawled")
+        if self.known_skipped:
+            print(f"Skipped {self.known_skipped} already known videos")
+        print(f"YouTube quota: {self.ledger.used} of {self.ledger.daily_limit} units used today")
+        
+        return await self._process_candidates(list(candidates.values()))
     
-    async def crawl_concerts(self) -> List[Dict[str, Any]]:
-        return await self._crawl_by_type("concert")
+    async def _resolve_uploads_playlist(self, channel: str) -> Optional[str]:
+        if channel in self.uploads_playlists:
+            return self.uploads_playlists[channel]
+        if not self.search.api.has_keys:
+            return None
+        playlist_id = await self.search.api.get_uploads_playlist(channel)
+        if playlist_id is None:
+            print(f"Official channel {channel} not found on YouTube")
+        self.uploads_playlists[channel] = playlist_id
+        return playlist_id
     
-    async def crawl_interviews(self) -> List[Dict[str, Any]]:
-        return await self._crawl_by_type("interview")
+    async def _fetch_uploads(self, channel: str, playlist_id: str, max_pages: int) -> List[Dict[str, Any]]:
+        query = self.uploads_query(channel)
+        watermark = self.watermarks.get(query)
+        videos: List[Dict[str, Any]] = []
+        page_token = None
+        
+        for _ in range(max(max_pages, 1)):
+            if not self.ledger.can_afford(PLAYLIST_PAGE_COST + DETAILS_PAGE_COST):
+                # The watermark stays put, so the next run pages this channel from the top again.
+                self.interruptions.append(f"quota left for {len(videos)} of {channel} uploads")
+                return videos
+            try:
+                page, page_token = await self.search.api.playlist_items_page(playlist_id, page_token=page_token)
+            except YouTubeAPIError as e:
+                if not videos:
+                    raise
+                raise PartialWindowError(videos, e) from e
+            videos.extend(page)
+            if not page_token or (watermark is not None and self._reaches_watermark(page, watermark)):
+                break
+        else:
+            # Without a pass to the end the watermark would hide the older uploads from later runs.
+            self.interruptions.append(f"{channel} uploads capped at {max_pages} pages, raise CRAWL_UPLOADS_MAX_PAGES")
+            return videos
+        
+        self._track_watermark(query, videos)
+        return videos
     
-    async def _crawl_by_type(self, content_type: str) -> List[Dict[str, Any]]:
-        all_videos = []
-        query_key = "concerts" if content_type == "concert" else "interviews"
-        queries = SEARCH_QUERIES.get(query_key, [])
+    def _reaches_watermark(self, videos: List[Dict[str, Any]], watermark: datetime) -> bool:
+        return any(
+            published_at <= watermark
+            for published_at in map(self._published_at, videos) if published_at is not None
+        )
+    
+    async def crawl_windows(
+        self,
+        windows: List[CrawlWindow],
+        budget: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        candidates: Dict[str, Dict[str, Any]] = {}
+        self.known_skipped = 0
         
-        for query in queries:
-            if content_type == "concert":
-                videos = await self.search.search_concerts(query)
-            else:
-                videos = await self.search.search_interviews(query)
-            
-            for video in videos:
-                if self.search.should_exclude(video.get('title', ''), video.get('description', ''), video.get('channel_title', '')):
-                    continue
-                
-                enriched = await self.search.enrich_video_data(video)
-                enriched['content_type'] = content_type
+        units = self.ledger.remaining if budget is None else min(budget, self.ledger.remaining)
+        planned = CrawlPlanner.fit_to_budget(windows, units)
+        print(
+            f"Crawl plan: {len(planned)} of {len(windows)} windows, up to {CrawlPlanner.estimate_cost(planned)} "
+            f"of {CrawlPlanner.estimate_cost(windows)} units, {units} units available"
+        )
+        if len(planned) < len(windows):
+            self.interruptions.append(f"quota budget covers {len(planned)} of {len(windows)} queries")
+        windows = planned
+        
+        for window, videos in await self._fan_out(windows):
+            self._collect_candidates(videos, window.query, candidates)
+        
+        if self.known_skipped:
+            print(f"Skipped {self.known_skipped} already known videos")
+        
+        return await self._process_candidates(list(candidates.values()))
+    
+    async def _fetch_window(self, window: CrawlWindow) -> List[Dict[str, Any]]:
+        videos: List[Dict[str, Any]] = []
+        page_token = None
+        complete = False
+        
+        for _ in range(max(window.max_pages, 1)):
+            if not self.ledger.can_afford(SEARCH_PAGE_COST + DETAILS_PAGE_COST):
+                break
+            try:
+                page, page_token = await self.search.search_page(
+                    window.text,
+                    window.content_type,
+                    order=window.order,
+                    published_after=window.published_after,
+                    published_before=window.published_before,
+                    page_token=page_token
+                )
+            except YouTubeAPIError as e:
+                if not videos:
+                    raise
+                # The unfetched tail of the window is older than what was fetched, so the watermark stays put.
+                raise PartialWindowError(videos, e) from e
+            videos.extend(page)
+            if not page_token:
+                complete = True
+                break
+        
+        if window.order != "date":
+            return videos
+        # Only a newest-first window paged to the end proves nothing older than its newest hit is missing.
+        resume = self.resume_points.get(window.query) if window.published_before is not None else None
+        if complete:
+            self._track_watermark(window.query, videos)
+            if resume is not None:
+                # The gap is closed; uploads from the resume point on were fetched by earlier runs.
+                for published_at in resume:
+                    if published_at is not None:
+                        self._raise_watermark(window.query, published_at)
+                self.seen_resume_points[window.query] = None
+        else:
+            self.truncated.add(window)
+            published = [published_at for published_at in map(self._published_at, videos) if published_at]
+            if published:
+                newest = resume[1] if resume is not None else max(published)
+                self.seen_resume_points[window.query] = (min(published), newest)
+        return videos
+    
+    @staticmethod
+    def _published_at(video: Dict[str, Any]) -> Optional[datetime]:
+        published_at = DateParser.parse_youtube_datetime(str(video.get('published_at') or ""))
+        if published_at is not None and published_at.tzinfo is not None:
+            published_at = published_at.astimezone(timezone.utc).replace(tzinfo=None)
+        return published_at
+    
+    def _track_watermark(self, query: str, videos: List[Dict[str, Any]]):
+        for video in videos:
+            published_at = self._published_at(video)
+            if published_at is not None:
+                self._raise_watermark(query, published_at)
+    
+    def _raise_watermark(self, query: str, published_at: datetime):
+        current = self.seen_watermarks.get(query)
+        if current is None or published_at > current:
+            self.seen_watermarks[query] = published_at
+    
+    async def _fan_out(self, windows: List[CrawlWindow]) -> List[Tuple[CrawlWindow, List[Dict[str, Any]]]]:
+        semaphore = asyncio.Semaphore(max(self.concurrency, 1))
+        self.query_stats = []
+        self.quota_exhausted = False
+        self.seen_watermarks = {}
+        self.seen_resume_points = {}
+        self.truncated = set()
+        self.progress.stage = "search"
+        self.progress.queries_total += len(windows)
+        crawl_started = time.monotonic()
+        
+        async def run(window: CrawlWindow) -> Tuple[CrawlWindow, List[Dict[str, Any]]]:
+            async with semaphore:
+                if self.quota_exhausted:
+                    self.query_stats.append({"query": window.label, "hits": 0, "seconds": 0.0, "status": "skipped"})
+                    self.progress.queries_done += 1
+                    return window, []
                 
-                quality_score = self.scorer.calculate_score(enriched)
-                enriched['quality_score'] = quality_score
+                started = time.monotonic()
+                status = "ok"
+                videos: List[Dict[str, Any]] = []
+                try:
+                    videos = await self._fetch_window(window)
+                    if window in self.truncated:
+                        status = "truncated"
+                except PartialWindowError as e:
+                    videos = e.videos
+                    status = "partial"
+                    self.quota_exhausted = isinstance(e.error, YouTubeQuotaExceededError)
+                except YouTubeQuotaExceededError:
+                    self.quota_exhausted = True
+                    status = "quota_exceeded"
+                except YouTubeRateLimitError:
+                    status = "rate_limited"
+                except YouTubeAPIError as e:
+                    status = "error"
+                    print(f"YouTube API error for {window.label}: {e}")
                 
-                is_complete = self.scorer.is_complete(enriched, content_type)
-                enriched['is_complete'] = is_complete
+                elapsed = time.monotonic() - started
+                self.progress.queries_done += 1
+                self.progress.videos_found += len(videos)
+                self.query_stats.append({
+                    "query": window.label,
+                    "hits": len(videos),
+                    "seconds": round(elapsed, 3),
+                    "status": status
+                })
+                print(f"Searched: {window.label} - {len(videos)} hits in {elapsed:.2f}s ({status})")
+                return window, videos
+        
+        results = await asyncio.gather(*(run(window) for window in windows))
+        
+        print(f"Crawled {len(windows)} windows in {time.monotonic() - crawl_started:.2f}s")
+        if self.quota_exhausted:
+            print("YouTube quota exhausted, remaining queries were skipped")
+        skipped = sum(1 for stat in self.query_stats if stat["status"] in ("skipped", "quota_exceeded"))
+        failed = sum(1 for stat in self.query_stats if stat["status"] in ("partial", "rate_limited", "error"))
+        if skipped:
+            self.interruptions.append(f"quota exceeded, {skipped} of {len(windows)} queries skipped")
+        if failed:
+            self.interruptions.append(f"{failed} of {len(windows)} queries failed or incomplete")
+        if self.truncated:
+            self.interruptions.append(f"{len(self.truncated)} of {len(windows)} queries have older uploads left for the next run")
+        print(f"YouTube quota: {self.ledger.used} of {self.ledger.daily_limit} units used today")
+        return results
+    
+    def _collect_candidates(self, videos: List[Dict[str, Any]], query: str, candidates: Dict[str, Dict[str, Any]]):
+        for video in videos:
+            if video['youtube_id'] in candidates:
+                continue
+            if self.search.should_exclude(video.get('title', ''), video.get('description', ''), video.get('channel_title', '')):
+                continue
+            if video['youtube_id'] in self.known_ids:
+                self.known_skipped += 1
+                continue
+            video['search_query'] = query
+            candidates[video['youtube_id']] = video
+    
+    async def _process_candidates(self, candidates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        all_videos = []
+        self.progress.stage = "enrich"
+        self.pending_queries = set()
+        
+        try:
+            enriched_videos = await self.search.enrich_videos(candidates)
+        except PartialEnrichmentError as e:
+            enriched_videos = e.videos
+            self.interruptions.append(f"details missing for {len(e.pending)} videos ({e.error.reason or e.error.status})")
+            # Keep these queries' watermarks where they were so the next run finds the videos again.
+            self.pending_queries = {video.get('search_query') for video in e.pending}
+            for video in e.pending:
+                self.seen_watermarks.pop(video.get('search_query'), None)
+                self.seen_resume_points.pop(video.get('search_query'), None)
+        
+        for enriched in enriched_videos:
+            video_type = self.classifier.classify(enriched)
+            enriched['content_type'] = video_type
+            
+            quality_score = self.scorer.calculate_score(enriched)
+            enriched['quality_score'] = quality_score
+            
+            is_complete = self.scorer.is_complete(enriched, video_type)
+            enriched['is_complete'] = is_complete
 
-                if not is_complete:
-                    continue
-                
-                quality_tags = self.scorer.get_tags(enriched)
-                enriched['quality_tags'] = " • ".join(quality_tags) if quality_tags else ""
-                
-                tour_name = self.tour_detector.detect_tour(enriched.get('title', ''))
-                enriched['tour_name'] = tour_name
+            if not is_complete:
+                continue
+            
+            quality_tags = self.scorer.get_tags(enriched)
+            enriched['quality_tags'] = " • ".join(quality_tags) if quality_tags else ""
+            
+            tour_name = self.tour_detector.detect_tour(enriched.get('title', ''))
+            enriched['tour_name'] = tour_name
 
-                title_date = DateParser.extract_date_from_title(enriched.get('title', ''))
-                published_at = enriched.get('published_at')
-                if hasattr(published_at, "date"):
-                    published_date = published_at.date()
-                else:
-                    published_date = DateParser.parse_youtube_date(str(published_at or ""))
-                enriched['date_event'] = title_date or published_date
-                
-                enriched['search_query'] = query
-                enriched['is_official'] = self.scorer.is_official_channel(enriched.get('channel_title', ''))
-                
-                all_videos.append(enriched)
+            title_date = DateParser.extract_date_from_title(enriched.get('title', ''))
+            published_at = enriched.get('published_at')
+            if hasattr(published_at, "date"):
+                published_date = published_at.date()
+            else:
+                published_date = DateParser.parse_youtube_date(str(published_at or ""))
+            enriched['date_event'] = title_date or published_date
             
-            await asyncio.sleep(1)
+            enriched['is_official'] = self.scorer.is_official_channel(enriched.get('channel_title', ''))
+            
+            all_videos.append(enriched)
         
         return all_videos
     
-    async def sync_to_database(self) -> int:
-        videos = await self.crawl_all()
+    async def sync_to_database(self, mode: str = CRAWL_MODE_FULL, refresh_existing: bool = False) -> int:
+        self.interruptions = []
+        self.crawled_windows = []
+        async with AsyncSessionLocal() as session:
+            self.watermarks = await QueryWatermarkRepository(session).get_watermarks()
+            self.resume_points = await QueryWatermarkRepository(session).get_resume_points()
+            self.known_ids = set() if refresh_existing else await VideoRepository(session).get_known_youtube_ids()
+        await self.ledger.load()
         
+        try:
+            if mode == CRAWL_MODE_UPLOADS:
+                videos = await self.crawl_uploads()
+            elif mode == CRAWL_MODE_ARCHIVE:
+                videos = await self.crawl_archive()
+            else:
+                videos = await self.crawl_all(incremental=mode == CRAWL_MODE_INCREMENTAL)
+        finally:
+            await self.ledger.flush()
+        
+        self.progress.stage = "save"
         async with AsyncSessionLocal() as session:
             repo = VideoRepository(session)
-            count = await repo.bulk_insert_videos(videos)
-            return count
-    
-    async def enrich_video_data(self, video_data: Dict[str, Any]) -> Dict[str, Any]:
-        video_ids = [video_data['youtube_id']]
-        details = await self.search.api.get_video_details(video_ids)
-        
-        if details:
-            detail = details[0]
-            video_data.update({
-                'duration': detail.get('duration'),
-                'view_count': detail.get('view_count'),
-                'duration_seconds': parse_youtube_duration(detail.get('duration', ''))
-            })
+            result = await repo.bulk_upsert_videos(videos, update_existing=refresh_existing)
+            self.progress.videos_added = result["inserted"]
+            self.known_ids.update(video['youtube_id'] for video in videos)
+            await QueryWatermarkRepository(session).update_watermarks(self.seen_watermarks, self.seen_resume_points)
+            await ArchiveProgressRepository(session).mark_crawled(self.crawled_windows)
+            print(f"Saved videos: {result['inserted']} inserted, {result['updated']} updated")
         
-        return video_data
+        if result["inserted"] or result["updated"]:
+            if mode == CRAWL_MODE_FULL:
+                await invalidate_pages()
+                await sweep_stale_pages()
+            else:
+                await invalidate_pages(video_tags(videos))
+            await get_catalog_watcher().check()
+        return result["inserted"]
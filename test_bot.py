@@ -192,6 +192,314 @@ def test_formatters():
         print(f"❌ Formatters - ОШИБКА: {e}")
         return False
 
+def test_query_plans():
+    """Проверка планов запросов к каталогу"""
+    print("\n🔍 Проверка планов запросов...")
+    
+    from sqlalchemy import create_engine, text
+    from database.models import Base, _migrate_schema
+    from database.repository import VideoRepository
+    
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        _migrate_schema(conn)
+    
+    queries = {
+        "archive": VideoRepository.listing_query(),
+        "concerts": VideoRepository.listing_query(content_type="concert"),
+        "year": VideoRepository.listing_query(content_type="concert", year=1991),
+        "tour": VideoRepository.listing_query(tour_name="M72 World Tour"),
+        "year_count": VideoRepository.count_query(content_type="interview", year=1991),
+    }
+    
+    with engine.connect() as conn:
+        for name, query in queries.items():
+            sql = str(query.limit(10).compile(engine, compile_kwargs={"literal_binds": True}))
+            plan = " | ".join(row[3] for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql)))
+            assert "USING" in plan and "INDEX" in plan, f"{name}: запрос без индекса: {plan}"
+            assert "TEMP B-TREE" not in plan, f"{name}: сортировка без индекса: {plan}"
+        
+        sql = str(VideoRepository.search_query('"metallica"*').compile(engine, compile_kwargs={"literal_binds": True}))
+        plan = " | ".join(row[3] for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql)))
+        assert "VIRTUAL TABLE INDEX" in plan, f"search: запрос без FTS-индекса: {plan}"
+    
+    print("✅ Планы запросов - OK")
+
+def test_page_cursors():
+    """Проверка курсоров и keyset-пагинации через строки без event_date"""
+    print("\n🔍 Проверка курсоров...")
+    
+    from datetime import date
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    from database.models import Base, Video
+    from database.pagination import PageCursor, SEEK_AT, SEEK_BEFORE
+    from database.read_model import CatalogSnapshot, CARD_FIELDS
+    from database.repository import VideoRepository
+    
+    for cursor in (
+        PageCursor(date(1991, 8, 12), "concert", 12345, SEEK_BEFORE),
+        PageCursor(None, None, 7),
+        PageCursor(None, "interview", 1, SEEK_AT),
+    ):
+        token = cursor.encode()
+        assert PageCursor.is_token(token), f"Некорректный токен {token}"
+        assert PageCursor.decode(token) == cursor, f"{token} не декодируется обратно в {cursor}"
+    assert PageCursor.decode("x1.c.1") is None, "Мусорный токен должен давать None"
+    assert PageCursor.decode(None) is None, "Пустой токен должен давать None"
+    
+    events = [
+        (1, None, "interview"), (2, None, "concert"), (3, None, "concert"),
+        (4, date(1991, 8, 12), "interview"), (5, date(1991, 8, 12), "concert"),
+        (6, date(1986, 3, 3), "concert"), (7, date(2024, 4, 20), "concert"), (8, None, "interview"),
+    ]
+    rows = [
+        dict(id=video_id, youtube_id=f"v{video_id}", title=f"Video {video_id}", url="", content_type=content_type,
+             event_date=event_date, event_year=event_date.year if event_date else None)
+        for video_id, event_date, content_type in events
+    ]
+    # NULL event_date first, then (event_date, content_type, id), as SQLite orders them
+    expected = [row["id"] for row in sorted(
+        rows, key=lambda row: (row["event_date"] is not None, row["event_date"] or date.min, row["content_type"] or "", row["id"])
+    )]
+    
+    async def walk(fetch):
+        forward, cursor = [], None
+        while True:
+            page = await fetch(cursor)
+            if not page.videos:
+                break
+            forward.extend(video.id for video in page.videos)
+            cursor = PageCursor.decode(page.cursors[2])
+        
+        backward, cursor = [], PageCursor.decode(page_cursor_after_last(forward))
+        while True:
+            page = await fetch(cursor)
+            if not page.videos:
+                break
+            backward = [video.id for video in page.videos] + backward
+            cursor = PageCursor.decode(page.cursors[0])
+        return forward, backward
+    
+    def page_cursor_after_last(ids):
+        last = next(row for row in rows if row["id"] == ids[-1])
+        return PageCursor(last["event_date"], last["content_type"], last["id"], SEEK_BEFORE).encode()
+    
+    async def check_database():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+            session.add_all(Video(**row) for row in rows)
+            await session.commit()
+            repo = VideoRepository(session)
+            result = await walk(lambda cursor: repo.get_page_with_count(cursor, limit=3))
+        await engine.dispose()
+        return result
+    
+    forward, backward = asyncio.run(check_database())
+    assert forward == expected, f"SQL вперёд: {forward} != {expected}"
+    assert backward == expected[:-1], f"SQL назад: {backward} != {expected[:-1]}"
+    
+    snapshot = CatalogSnapshot([
+        tuple(row.get(name) for name in CARD_FIELDS)
+        for row in sorted(rows, key=lambda row: expected.index(row["id"]))
+    ])
+    
+    async def snapshot_page(cursor):
+        return snapshot.page(cursor, limit=3)
+    
+    forward, backward = asyncio.run(walk(snapshot_page))
+    assert forward == expected, f"Снимок вперёд: {forward} != {expected}"
+    assert backward == expected[:-1], f"Снимок назад: {backward} != {expected[:-1]}"
+    
+    print("✅ Курсоры - OK")
+
+def test_token_bucket():
+    """Проверка ограничения частоты запросов TokenBucket"""
+    print("\n🔍 Проверка TokenBucket...")
+    
+    import time
+    from services.youtube.limiter import TokenBucket
+    
+    async def timed(bucket, count):
+        started = time.monotonic()
+        for _ in range(count):
+            await bucket.acquire()
+        return time.monotonic() - started
+    
+    assert asyncio.run(timed(TokenBucket(0), 100)) < 0.05, "rate=0 не должен ограничивать"
+    assert asyncio.run(timed(TokenBucket(20, capacity=3), 3)) < 0.05, "Запас bucket должен выдаваться сразу"
+    assert asyncio.run(timed(TokenBucket(20, capacity=3), 5)) >= 0.09, "Сверх запаса - не быстрее rate"
+    
+    async def penalized():
+        bucket = TokenBucket(1000, capacity=10)
+        bucket.penalize(0.1)
+        return await timed(bucket, 1)
+    
+    assert asyncio.run(penalized()) >= 0.09, "После penalize запросы должны ждать"
+    
+    print("✅ TokenBucket - OK")
+
+def test_backoff_delay():
+    """Проверка экспоненциальной задержки с jitter"""
+    print("\n🔍 Проверка backoff_delay...")
+    
+    from services.youtube.limiter import backoff_delay
+    
+    for attempt in range(8):
+        step = min(8.0, 0.5 * 2 ** attempt)
+        delay = backoff_delay(attempt, 0.5, 8.0)
+        assert step / 2 <= delay <= step, f"Попытка {attempt}: {delay} вне [{step / 2}, {step}]"
+    
+    print("✅ backoff_delay - OK")
+
+def test_crawl_budget():
+    """Проверка распределения квоты по окнам обхода"""
+    print("\n🔍 Проверка бюджета обхода...")
+    
+    from services.youtube.planner import CrawlPlanner, CrawlWindow, SEARCH_PAGE_COST, DETAILS_PAGE_COST
+    
+    page = SEARCH_PAGE_COST + DETAILS_PAGE_COST
+    windows = [
+        CrawlWindow("c1", "concert", max_pages=3),
+        CrawlWindow("c2", "concert", max_pages=3),
+        CrawlWindow("i1", "interview", max_pages=3),
+    ]
+    
+    assert CrawlPlanner.fit_to_budget(windows, page - 1) == [], "Без страницы в бюджете план пуст"
+    
+    plan = CrawlPlanner.fit_to_budget(windows, 2 * page)
+    assert [(w.query, w.max_pages) for w in plan] == [("c1", 1), ("i1", 1)], f"Типы должны чередоваться: {plan}"
+    
+    plan = CrawlPlanner.fit_to_budget(windows, 4 * page + page // 2)
+    assert [(w.query, w.max_pages) for w in plan] == [("c1", 2), ("c2", 1), ("i1", 1)], f"Сначала по странице каждому: {plan}"
+    assert CrawlPlanner.estimate_cost(plan) <= 4 * page + page // 2, "План дороже бюджета"
+    
+    assert CrawlPlanner.fit_to_budget(windows, 100 * page) == windows, "Большой бюджет не должен урезать план"
+    
+    print("✅ Бюджет обхода - OK")
+
+def test_archive_rotation():
+    """Проверка очерёдности окон архивного обхода"""
+    print("\n🔍 Проверка ротации архива...")
+    
+    from datetime import datetime
+    from services.youtube.planner import CrawlPlanner, CrawlWindow
+    
+    windows = [CrawlWindow("c1", "concert"), CrawlWindow("c2", "concert"), CrawlWindow("i1", "interview")]
+    rotated = CrawlPlanner.rotate(windows, {"c1": datetime(2024, 1, 2), "i1": datetime(2024, 1, 1)})
+    assert [w.query for w in rotated] == ["c2", "i1", "c1"], f"Сначала непройденные, потом давно пройденные: {rotated}"
+    assert CrawlPlanner.rotate(windows, {}) == windows, "Без истории порядок не меняется"
+    
+    print("✅ Ротация архива - OK")
+
+def test_single_flight():
+    """Проверка объединения одинаковых конкурентных загрузок"""
+    print("\n🔍 Проверка SingleFlight...")
+    
+    from database.singleflight import SingleFlight
+    
+    async def scenario():
+        flights = SingleFlight(timeout=1)
+        calls = []
+        
+        async def load():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return {"page": len(calls)}
+        
+        results = await asyncio.gather(*(flights.do("list:a", load) for _ in range(5)))
+        assert len(calls) == 1, f"Ожидалась одна загрузка, было {len(calls)}"
+        assert all(result is results[0] for result in results), "Все ждущие получают один результат"
+        assert flights.stats() == {"in_flight": 0, "started": 1, "joined": 4, "timeouts": 0}, flights.stats()
+        
+        await flights.do("list:a", load)
+        assert len(calls) == 2, "После завершения ключ загружается заново"
+        
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("db down")
+        
+        errors = await asyncio.gather(*(flights.do("list:b", fail) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(error, RuntimeError) for error in errors), f"Ошибка должна дойти до всех: {errors}"
+        
+        async def stuck():
+            await asyncio.sleep(1)
+            return "slow"
+        
+        async def fast():
+            return "fast"
+        
+        leader = asyncio.ensure_future(flights.do("list:c", stuck))
+        await asyncio.sleep(0)
+        assert await flights.do("list:c", fast, timeout=0.01) == "fast", "Ждущий после таймаута грузит сам"
+        assert flights.timeouts == 1
+        leader.cancel()
+    
+    asyncio.run(scenario())
+    print("✅ SingleFlight - OK")
+
+def test_cache_envelope():
+    """Проверка бинарного формата записей кэша"""
+    print("\n🔍 Проверка Envelope...")
+    
+    from database.cache import Envelope, CodecError, available_codecs, available_compressors
+    
+    value = {"videos": [[i, f"Metallica {i}", None, True] for i in range(200)], "total": 200}
+    small = {"total": 1}
+    
+    for codec in available_codecs():
+        for compression in list(available_compressors()) + ["none"]:
+            envelope = Envelope(codec, compression, threshold=256)
+            data = envelope.dumps(value)
+            assert envelope.loads(data) == value, f"{codec}/{compression}: значение не совпало"
+            if compression != "none":
+                assert data[3:4] != b"n", f"{codec}/{compression}: большое значение не сжато"
+            assert envelope.dumps(small)[3:4] == b"n", f"{codec}/{compression}: мелкое значение сжато"
+            assert Envelope("json", "zlib").loads(data) == value, f"{codec}/{compression}: не читается другим экземпляром"
+    
+    envelope = Envelope("json", "zlib", threshold=0)
+    data = envelope.dumps(value)
+    for corrupt in (b"not an envelope", data[:4] + b"garbage", data[:1] + bytes([data[1] + 1]) + data[2:]):
+        try:
+            envelope.loads(corrupt)
+        except CodecError:
+            continue
+        raise AssertionError(f"Повреждённая запись прочитана: {corrupt[:10]!r}")
+    
+    print("✅ Envelope - OK")
+
+def test_key_pool():
+    """Проверка взвешенного round-robin по API-ключам"""
+    print("\n🔍 Проверка пула ключей...")
+    
+    from services.youtube.keys import ApiKeyPool, parse_api_keys, key_id_for
+    
+    assert parse_api_keys("A:3, B ,A:2", "") == [("A", 2), ("B", 1)], "Дубликаты ключей схлопываются"
+    assert parse_api_keys("", "SINGLE") == [("SINGLE", 1)], "YOUTUBE_API_KEY - запасной вариант"
+    for raw in ("A:x", "A:0"):
+        try:
+            parse_api_keys(raw, "")
+        except ValueError:
+            continue
+        raise AssertionError(f"Вес в '{raw}' должен отклоняться")
+    
+    pool = ApiKeyPool([("A", 3), ("B", 1)], daily_limit=1000)
+    names = {key_id_for("A"): "A", key_id_for("B"): "B"}
+    picks = [names[pool.acquire(1).key_id] for _ in range(8)]
+    assert picks == ["A", "A", "B", "A"] * 2, f"Ожидалось плавное чередование 3:1, получено {picks}"
+    
+    pool.cooldown(pool.keys[0])
+    assert [names[pool.acquire(1).key_id] for _ in range(3)] == ["B"] * 3, "Ключ на паузе не выдаётся"
+    assert pool.remaining == 1000, "Остаток считается без ключей на паузе"
+    
+    pool.keys[1].ledger.charge("search", 10)
+    assert not pool.can_afford(1), "Без квоты ни один ключ не доступен"
+    assert pool.acquire(1) is None
+    
+    print("✅ Пул ключей - OK")
+
 def test_files():
     """Проверка наличия файлов"""
     print("\n🔍 Проверка файлов...")
@@ -228,6 +536,15 @@ def test_files():
     
     return all_ok
 
+def _passes(check) -> bool:
+    """Запуск assert-проверки из main(): pytest вызывает такие функции сам"""
+    try:
+        check()
+        return True
+    except Exception as e:
+        print(f"❌ {check.__name__} - ОШИБКА: {e!r}")
+        return False
+
 def main():
     """Главная функция тестирования"""
     print("=" * 60)
@@ -243,6 +560,15 @@ def main():
     results.append(("QualityScorer", test_quality_scorer()))
     results.append(("ContentClassifier", test_classifier()))
     results.append(("Formatters", test_formatters()))
+    results.append(("Планы запросов", _passes(test_query_plans)))
+    results.append(("Курсоры", _passes(test_page_cursors)))
+    results.append(("TokenBucket", _passes(test_token_bucket)))
+    results.append(("backoff_delay", _passes(test_backoff_delay)))
+    results.append(("Бюджет обхода", _passes(test_crawl_budget)))
+    results.append(("Ротация архива", _passes(test_archive_rotation)))
+    results.append(("SingleFlight", _passes(test_single_flight)))
+    results.append(("Envelope", _passes(test_cache_envelope)))
+    results.append(("Пул ключей", _passes(test_key_pool)))
     
     print("\n" + "=" * 60)
     print("📊 Результаты тестирования:")
@@ -1,9 +1,11 @@
 from utils.date_parser import DateParser
 from utils.tour_detector import TourDetector
 from utils.formatters import Formatter
+from utils.circuit_breaker import CircuitBreaker
 
 __all__ = [
     "DateParser",
     "TourDetector", 
-    "Formatter"
+    "Formatter",
+    "CircuitBreaker"
 ]
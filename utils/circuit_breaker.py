@@ -0,0 +1,54 @@
+import time
+from typing import Optional
+
+
+class CircuitBreaker:
+    """Stops calling a dependency (Redis, the YouTube API) after repeated failures and probes it again after a pause."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.pause: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        pause = self.reset_timeout if self.pause is None else self.pause
+        if time.monotonic() - self.opened_at >= pause:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == self.HALF_OPEN:
+            # Let exactly one probe through; the next failure re-opens for another full pause.
+            self.opened_at = time.monotonic()
+            self.pause = None
+            return True
+        return state == self.CLOSED
+
+    def record_success(self) -> bool:
+        recovered = self.opened_at is not None
+        self.failures = 0
+        self.opened_at = None
+        self.pause = None
+        return recovered
+
+    def record_failure(self):
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self.pause = None
+
+    def trip(self, pause: float):
+        """Open now for ``pause`` seconds, e.g. until a known reset time, whatever the failure count."""
+        self.failures += 1
+        self.opened_at = time.monotonic()
+        self.pause = pause
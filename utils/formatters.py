@@ -1,3 +1,4 @@
+import re
 from database.models import Video
 from utils.date_parser import DateParser
 
@@ -46,6 +47,27 @@ class Formatter:
             f"📦 Всего: {total_count}"
         )
     
+    @staticmethod
+    def format_cache_stats(stats: dict) -> str:
+        requests = stats["hits"] + stats["misses"]
+        hit_rate = stats["hits"] * 100 // requests if requests else 0
+        return f"🗄 Кэш страниц: {stats['hits']} попаданий / {stats['misses']} промахов ({hit_rate}%)"
+    
+    @staticmethod
+    def format_read_model(size: int) -> str:
+        return f"🧠 Каталог в памяти: {size} видео"
+    
+    @staticmethod
+    def format_quota(quota: dict) -> str:
+        reset_at = quota["reset_at"].strftime("%H:%M UTC")
+        lines = [f"📉 Квота YouTube: осталось {quota['remaining']} из {quota['limit']} (сброс в {reset_at})"]
+        keys = quota.get("keys", [])
+        if len(keys) > 1:
+            for key in keys:
+                state = " ⏸" if key["cooling_down"] else ""
+                lines.append(f"🔑 {key['key_id']} ×{key['weight']}: {key['remaining']}/{key['limit']}{state}")
+        return "\n".join(lines)
+    
     @staticmethod
     def format_tour_header(tour_name: str, count: int) -> str:
         return (
@@ -61,6 +83,11 @@ class Formatter:
         type_label = "концертов" if content_type == "concert" else "интервью"
         return f"🔍 По запросу \"{query}\" найдено {count} {type_label}"
     
+    @staticmethod
+    def format_search_header(query: str, count: int) -> str:
+        safe_query = re.sub(r"[*_`\[\]]", "", query)
+        return f"🔍 **Поиск: {safe_query}** ({count} найдено)"
+    
     @staticmethod
     def format_error(message: str) -> str:
         return f"❌ Ошибка: {message}"
@@ -85,3 +112,13 @@ class Formatter:
             f"📊 Найдено: {videos_found}\n"
             f"➕ Добавлено: {videos_added}"
         )
+    
+    @staticmethod
+    def format_sync_progress(progress, elapsed: float) -> str:
+        stages = {"queued": "в очереди", "search": "поиск", "enrich": "обработка", "save": "сохранение", "done": "готово"}
+        return (
+            f"🔄 Обновление: {stages.get(progress.stage, progress.stage)} ({int(elapsed)} с)\n"
+            f"🔍 Запросов: {progress.queries_done}/{progress.queries_total}\n"
+            f"📊 Найдено: {progress.videos_found}\n"
+            f"➕ Добавлено: {progress.videos_added}"
+        )